@@ -2,19 +2,132 @@
 # Cricket Stats • Production-ready API
 #  - lists/{formats,events,teams,players}
 #  - batting, bowling, teams, matchup
+#
+#  Deliveries are loaded once at startup into a native, sorted DuckDB table
+#  `balls` (CRICKET_BALLS_MODE=table, default).  Point CRICKET_DB at a file
+#  (e.g. cricket.duckdb) and warm restarts skip the load until the Parquet
+#  changes.  CRICKET_BALLS_MODE=parquet scans the hive-partitioned
+#  balls_parted/ layout per request, opening only the season=/match_type=
+#  directories the fmt / last arguments can match.
+#
+#  Players, teams, venues and events are integer ids (see dims.py); every
+#  filter, join and GROUP BY works on the ids, names are decoded on output.
+#  Name filters are resolved to ids by an in-process NameIndex (also behind
+#  /search/{players,teams,events,venues}) and pushed into SQL as IN lists.
+#  The /lists/* dropdowns (with match counts and last-seen dates) come from
+#  api/parquet/filter_lists.parquet, held in memory – no query per request.
+#
+#  /batting and /bowling aggregate `cube` – one row per match × innings ×
+#  player (facts.py), read from api/parquet/innings_cube/ or derived
+#  from `balls` when that file is missing – instead of raw deliveries.
+#  Without event / opposition / venue / innings filters they read
+#  `player_years` instead: running totals per player × team through each
+#  season, so a "last N years" window is two prefix sums subtracted.
+#
+#  /matchup (batter vs every bowler) and /matchup/bowler (bowler vs every
+#  batter) read the sparse batter × bowler store (facts.MATCHUP_SQL, from
+#  api/parquet/matchups/ or derived from `balls`), held in memory as Arrow
+#  and sliced per player through CSR-style offsets – no delivery scan.
+#  Without an event filter they slice the yearly running totals
+#  (facts.MATCHUP_YEARS_SQL) the same way and subtract two prefix sums.
+#
+#  /batting, /batting/drill, /bowling, /team and /matchup results are kept in
+#  an LRU + TTL cache (size-capped); counters at /cache/stats.  When the
+#  Parquet dataset version changes, the tables and in-memory indexes are
+#  rebuilt and swapped in first, then the cache is flushed (see LIFECYCLE).
+#
+#  Every thread queries through its own cursor (con()) on the one shared
+#  database, so requests no longer serialise on a single connection.  Those
+#  analytic endpoints are async and run on a bounded query pool
+#  (CRICKET_QUERY_WORKERS threads, at most CRICKET_QUERY_QUEUE waiting, then
+#  503 + Retry-After); load and queueing counters at /pool/stats.
+#
+#  Those endpoints build their result as an Arrow table straight from DuckDB
+#  (derived metrics are computed in the SQL, see metrics.py) and answer per
+#  the Accept header:
+#  JSON by default, Arrow IPC stream for application/vnd.apache.arrow.stream,
+#  Parquet for application/vnd.apache.parquet, one JSON object per line for
+#  application/x-ndjson.
+#
+#  /batting, /bowling and /batting/drill take limit (top-K, pushed into the
+#  SQL as ORDER BY … LIMIT) and cursor (keyset: rows after the previous
+#  page's last one); the next page's cursor comes back in X-Next-Cursor.
+#  Asked for NDJSON they stream rows as DuckDB produces them instead of
+#  building the result first, the next cursor as a final {"next_cursor"} line.
+#
+#  POST /batch runs several list / search / analytic GETs concurrently and
+#  returns all their JSON results in one response.
+#
+#  Startup returns at once: loading, indexing and priming the hottest
+#  queries run on a background thread, timed per stage.  Until they finish
+#  every route but /healthz (liveness), /readyz (readiness, 503 until warm,
+#  with the stage timings) and /metrics answers 503 + Retry-After.
+#
+#  Every request is timed by middleware, split into DuckDB execution, Arrow
+#  fetch and response rendering (also sent back as a Server-Timing header);
+#  endpoint SQL goes through query(), which times it and appends anything
+#  slower than CRICKET_SLOW_MS to the JSONL log CRICKET_SLOW_LOG (with
+#  DuckDB's JSON profile when CRICKET_PROFILE=1).  Histograms and counters
+#  are exported in Prometheus text format at /metrics.
 ##############################################################################
-from typing import Optional, List, Dict, Any, Tuple
-from fastapi import FastAPI, HTTPException, Query
+from typing import Optional, List, Dict, Any, Tuple, Union
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-import duckdb, os, math, datetime, re
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from urllib.parse import quote, unquote
+from bisect import bisect_left
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import duckdb, os, math, datetime, re, glob, difflib, functools, inspect, threading, time, asyncio
+import base64, contextlib, contextvars, json, tempfile, traceback
+import pyarrow as pa, pyarrow.compute as pc, pyarrow.parquet as pq
+
+try:
+    from api import dims, facts, metrics # uvicorn api.api:app  (repo root)
+except ImportError:
+    import dims, facts, metrics          # uvicorn api:app --app-dir api
 
 # ----------------------------------------------------------------------------
-PARQ_DIR = "api/parquet"
-BALLS    = os.path.join(PARQ_DIR, "cricket_balls.parquet")
-TEAM_BAT = os.path.join(PARQ_DIR, "team_phase_summary.parquet")
-TEAM_BWL = os.path.join(PARQ_DIR, "team_bowling_phase_summary.parquet")
+PARQ_DIR  = os.getenv("CRICKET_PARQ_DIR", "api/parquet")    # build_summaries.py --out-dir
+BALLS_DIR = os.getenv("CRICKET_BALLS_DIR", "balls_parted")   # season=/match_type=
+BALLS     = os.path.join(BALLS_DIR, "**", "*.parquet")
+CUBE      = os.path.join(PARQ_DIR, "innings_cube")      # build_summaries.py outputs:
+CUBE_GLOB = os.path.join(CUBE, "*", "*", "*.parquet")    #   <name>/match_type=/season=/
+LISTS     = os.path.join(PARQ_DIR, "filter_lists.parquet")
+MATCHUPS  = os.path.join(PARQ_DIR, "matchups", "*", "*", "*.parquet")
+PLAYER_YEARS  = os.path.join(PARQ_DIR, "player_years.parquet")
+MATCHUP_YEARS = os.path.join(PARQ_DIR, "matchup_years.parquet")
+
+DB_PATH    = os.getenv("CRICKET_DB", ":memory:")
+BALLS_MODE = os.getenv("CRICKET_BALLS_MODE", "table")       # table | parquet
+
+CACHE_TTL       = float(os.getenv("CRICKET_CACHE_TTL", 6 * 3600))   # seconds
+CACHE_MAX_BYTES = int(float(os.getenv("CRICKET_CACHE_MB", 64)) * 2**20)
+VERSION_EVERY   = 5.0       # seconds between dataset-version checks
+
+QUERY_WORKERS = int(os.getenv("CRICKET_QUERY_WORKERS", min(8, os.cpu_count() or 1)))
+QUERY_QUEUE   = int(os.getenv("CRICKET_QUERY_QUEUE", 64))   # waiting requests before 503
 
-db = duckdb.connect(database=":memory:")
+SLOW_MS  = float(os.getenv("CRICKET_SLOW_MS", 500))          # query() time that gets logged
+SLOW_LOG = os.getenv("CRICKET_SLOW_LOG", "slow_queries.jsonl")
+PROFILE  = os.getenv("CRICKET_PROFILE", "0") == "1"         # DuckDB JSON profile per query
+
+db = duckdb.connect(database=DB_PATH)
+_local = threading.local()
+
+def con() -> duckdb.DuckDBPyConnection:
+    """This thread's cursor on the shared database (a connection serialises its callers)."""
+    c = getattr(_local, "con", None)
+    if c is None:
+        c = _local.con = db.cursor()
+        if PROFILE:                               # profiling settings are per connection
+            _local.profile = os.path.join(tempfile.gettempdir(),
+                                          f"cricket_profile_{os.getpid()}_{threading.get_ident()}.json")
+            c.execute("SET enable_profiling = 'json'")
+            c.execute(f"SET profiling_output = '{_local.profile}'")
+    return c
 
 app = FastAPI(title="Cricket Stats – Production")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"])
@@ -25,26 +138,1006 @@ FORMATS = ("T20", "ODI", "Test")
 def ok(v: Any) -> Any:
     return None if isinstance(v, float) and not math.isfinite(v) else v
 
-def rows(cur) -> List[Dict[str, Any]]:
-    cols = [d[0] for d in cur.description]
-    data = [{c: ok(v) for c, v in zip(cols, r)} for r in cur.fetchall()]
-    if not data:
+def table(cur) -> pa.Table:
+    """Result as an Arrow table, straight from DuckDB; 404 when empty."""
+    t0 = time.perf_counter()
+    t = cur if isinstance(cur, pa.Table) else cur.fetch_arrow_table()
+    spent("fetch", time.perf_counter() - t0)
+    if not t.num_rows:
         raise HTTPException(404, "No rows")
-    return data
+    return t
+
+def records(t: pa.Table) -> List[Dict[str, Any]]:
+    return [{c: ok(v) for c, v in r.items()} for r in t.to_pylist()]
 
-def w(col: str, val: Optional[str]) -> str:
-    return f"{col} ILIKE '%' || ? || '%'" if val else f"{col} IS NOT NULL"
+def w(col: str, val, id_col: Optional[str] = None) -> str:
+    """
+    Substring filter on a name column (val: str or list of str, any may
+    match).  Resolved to ids through the name index; no value → IS NOT NULL.
+    id_col overrides the column the ids are matched against.
+    """
+    col_id, dim = dims.ID_COLS[col]
+    id_col = id_col or col_id
+    vals = val if isinstance(val, list) else [val] if val else []
+    if not vals:
+        return f"{id_col} IS NOT NULL"
+    ids = sorted({i for v in vals for i in INDEX[dim].contains(v)})
+    return f"{id_col} IN ({', '.join(map(str, ids))})" if ids else "FALSE"
+
+def cutoff_year(last: int) -> Optional[int]:
+    return datetime.date.today().year - last if last > 0 else None
 
 def season(last: int) -> str:
     """
     Season filter that also handles strings like '2013/14'.
     Keeps only rows where the *first* 4-digit year is within N years.
     """
-    if last <= 0:
+    cutoff = cutoff_year(last)
+    if cutoff is None:
         return "TRUE"
-    cutoff = datetime.date.today().year - last
-    # CAST(substr(season,1,4) AS INT) safely extracts the first year
-    return f"CAST(substr(season,1,4) AS INT) >= {cutoff}"
+    # season_year = CAST(substr(season,1,4) AS SMALLINT), derived at load time
+    return f"season_year >= {cutoff}"
+
+def summary_src(name: str, fmt: Optional[str] = None) -> str:
+    """
+    FROM-clause for one build_summaries.py output: its match_type=/season=
+    directory (only fmt's partitions when given), or the older single file.
+    Nothing to read (no such format, output not built) → 404, no empty glob.
+    """
+    base = os.path.join(PARQ_DIR, name)
+    if not os.path.isdir(base):
+        if not os.path.exists(f"{base}.parquet"):
+            raise HTTPException(404, "No rows")
+        return f"read_parquet('{base}.parquet')"
+    sub = f"match_type={quote(fmt, safe='')}" if fmt else "*"
+    files = os.path.join(base, sub, "*", "*.parquet")
+    if not glob.glob(files):
+        raise HTTPException(404, "No rows")
+    return f"read_parquet('{files}')"
+
+# ========================================================================== #
+# STARTUP – load deliveries once
+# ========================================================================== #
+# Narrow types + season_year; rows sorted so match_type / season filters
+# skip whole row groups via DuckDB's min-max zonemaps.
+BALLS_SELECT = """
+    SELECT
+      match_id::VARCHAR               AS match_id,
+      match_date::DATE                AS match_date,
+      event_id::INT                   AS event_id,
+      replace(season::VARCHAR, '%2F', '/') AS season,   -- hive dir 2013%2F14
+      CAST(substr(season::VARCHAR,1,4) AS SMALLINT) AS season_year,
+      match_type::VARCHAR             AS match_type,
+      venue_id::INT                   AS venue_id,
+      city::VARCHAR                   AS city,
+      innings_number::TINYINT         AS innings_number,
+      batting_team_id::INT            AS batting_team_id,
+      bowling_team_id::INT            AS bowling_team_id,
+      "over"::SMALLINT                AS "over",
+      ball_in_over::TINYINT           AS ball_in_over,
+      ball_number_absolute::SMALLINT  AS ball_number_absolute,
+      batter_id::INT                  AS batter_id,
+      bowler_id::INT                  AS bowler_id,
+      non_striker_id::INT             AS non_striker_id,
+      runs_batter::TINYINT            AS runs_batter,
+      runs_extras::TINYINT            AS runs_extras,
+      runs_total::TINYINT             AS runs_total,
+      extras_type::VARCHAR            AS extras_type,
+      is_boundary_4::BOOLEAN          AS is_boundary_4,
+      is_boundary_6::BOOLEAN          AS is_boundary_6,
+      wicket_type::VARCHAR            AS wicket_type,
+      player_out_id::INT              AS player_out_id,
+      fielders_involved::VARCHAR      AS fielders_involved
+    FROM {src}
+"""
+
+PARTS: List[Tuple[str, Optional[int], str]] = []   # (match_type, season_year, glob)
+HAS_IDS = True                                     # False → string-layout Parquet
+
+def scan_partitions() -> None:
+    """Index balls_parted/season=…/match_type=…; used to prune scans."""
+    parts = []
+    for s_dir in sorted(glob.glob(os.path.join(BALLS_DIR, "season=*"))):
+        raw = unquote(os.path.basename(s_dir).split("=", 1)[1])      # '2013/14'
+        year = int(raw[:4]) if raw[:4].isdigit() else None           # None → never pruned
+        for m_dir in sorted(glob.glob(os.path.join(s_dir, "match_type=*"))):
+            mtype = unquote(os.path.basename(m_dir).split("=", 1)[1])
+            parts.append((mtype, year, os.path.join(m_dir, "*.parquet")))
+    PARTS[:] = parts                              # swapped in whole (reloads)
+
+def scan_sql(files: List[str]) -> str:
+    lst = ", ".join("'" + f.replace("'", "''") + "'" for f in files)
+    src = f"read_parquet([{lst}], hive_partitioning = true, union_by_name = true)"
+    return src if HAS_IDS else dims.encoded(src)
+
+def balls_src(fmt: Optional[str] = None, last: int = 0) -> str:
+    """
+    FROM-clause for deliveries.  Table mode → `balls` (zonemaps prune on the
+    sorted match_type / season_year columns).  Parquet mode → read_parquet
+    over just the partitions whose match_type / first season year can match.
+    """
+    if BALLS_MODE == "table":
+        return "balls"
+    cutoff = cutoff_year(last)
+    files = [g for mtype, year, g in PARTS
+             if (fmt is None or mtype == fmt)
+             and (cutoff is None or year is None or year >= cutoff)]
+    if not files:
+        return "(SELECT * FROM balls LIMIT 0)"    # typed, empty
+    return "(" + BALLS_SELECT.format(src=scan_sql(files)) + ")"
+
+def source_stamp() -> str:
+    """Cheap fingerprint (path, size, mtime) of every Parquet file behind BALLS + dims + CUBE + PLAYER_YEARS."""
+    files = sorted(glob.glob(BALLS, recursive=True)) + sorted(
+        glob.glob(os.path.join(dims.DIMS_DIR, "*.parquet"))) + sorted(
+        glob.glob(CUBE_GLOB)) + glob.glob(PLAYER_YEARS)
+    return "|".join(f"{f}:{os.path.getsize(f)}:{os.stat(f).st_mtime_ns}" for f in files)
+
+def load_balls() -> None:
+    """
+    Create `balls` – the relation every endpoint queries – plus `cube`,
+    `player_years` and the players / teams / venues / events dimension tables.
+    table   : native sorted tables, rebuilt only when source_stamp() changes
+    parquet : plain views over read_parquet (re-opens the files per request);
+              `player_years` is small and always a table
+    """
+    global HAS_IDS
+    scan_partitions()
+    src = f"read_parquet('{BALLS}', hive_partitioning = true, union_by_name = true)"
+    if BALLS_MODE != "table":
+        HAS_IDS = dims.load(db, src)
+        db.execute("CREATE OR REPLACE VIEW balls AS " +
+                   BALLS_SELECT.format(src=src if HAS_IDS else dims.encoded(src)))
+        load_cube("VIEW")
+        load_years()
+        return
+
+    stamp = source_stamp()
+    db.execute("CREATE TABLE IF NOT EXISTS _meta (key VARCHAR PRIMARY KEY, value VARCHAR)")
+    have = db.execute("SELECT value FROM _meta WHERE key = 'balls_stamp'").fetchone()
+    if have and have[0] == stamp and db.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name IN ('balls', 'cube', 'player_years')"
+    ).fetchone()[0] == 3:
+        return                                    # warm restart – already loaded
+
+    HAS_IDS = dims.load(db, src)
+    db.execute(
+        "CREATE OR REPLACE TABLE balls AS " +
+        BALLS_SELECT.format(src=src if HAS_IDS else dims.encoded(src)) +
+        " ORDER BY match_type, season_year, match_id, innings_number, ball_number_absolute"
+    )
+    load_cube("TABLE")
+    load_years()
+    db.execute("INSERT OR REPLACE INTO _meta VALUES ('balls_stamp', ?)", (stamp,))
+
+def load_data() -> None:
+    """
+    load_balls() in one transaction: queries on other cursors keep seeing
+    the previous tables until it commits, so a reload swaps them all at once.
+    """
+    db.execute("BEGIN TRANSACTION")
+    try:
+        load_balls()
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+    if DB_PATH != ":memory:":
+        db.execute("CHECKPOINT")
+
+def load_cube(kind: str) -> None:
+    """`cube` from CUBE when build_summaries.py has written it, else from `balls`."""
+    if glob.glob(CUBE_GLOB):
+        body = f"SELECT * FROM read_parquet('{CUBE_GLOB}')"
+        if kind == "TABLE":
+            body += " ORDER BY match_type, season_year, player_id"   # zonemaps
+    else:
+        body = facts.cube_sql("balls")
+    db.execute(f"CREATE OR REPLACE {kind} cube AS {body}")
+
+def load_years() -> None:
+    """`player_years` from PLAYER_YEARS when build_summaries.py has written it, else from `cube`."""
+    body = (f"SELECT * FROM read_parquet('{PLAYER_YEARS}')" if os.path.exists(PLAYER_YEARS)
+            else facts.PLAYER_YEARS_SQL.format(cube="cube"))
+    db.execute(f"CREATE OR REPLACE TABLE player_years AS SELECT * FROM ({body}) "
+               "ORDER BY match_type, player_id, season_year")          # zonemaps
+
+# ========================================================================== #
+# NAME INDEX – typeahead + filter resolution
+# ========================================================================== #
+class NameIndex:
+    """
+    One dimension's names, held in memory.
+    prefix()   : bisect over the sorted lower-cased names
+    contains() : trigram postings, verified – same rows as ILIKE '%q%'
+    search()   : typeahead ranking prefix → word-start → substring → fuzzy
+    """
+    def __init__(self, pairs: List[Tuple[int, str]]):
+        self.name  = dict(pairs)
+        self.low   = {i: n.lower() for i, n in self.name.items()}
+        self.order = sorted((n, i) for i, n in self.low.items())
+        self.keys  = [n for n, _ in self.order]
+        self.by_name = defaultdict(list)
+        self.grams  = defaultdict(set)
+        for i, n in self.low.items():
+            self.by_name[n].append(i)
+            for j in range(len(n) - 2):
+                self.grams[n[j:j + 3]].add(i)
+
+    def exact(self, q: str) -> List[int]:
+        return self.by_name.get(q.lower(), [])
+
+    def prefix(self, q: str) -> List[int]:
+        q = q.lower()
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + "\uffff")
+        return [i for _, i in self.order[lo:hi]]
+
+    def contains(self, q: str) -> List[int]:
+        q = q.lower()
+        if len(q) < 3:
+            return [i for n, i in self.order if q in n]
+        posting = [self.grams.get(q[j:j + 3], set()) for j in range(len(q) - 2)]
+        cand = set.intersection(*sorted(posting, key=len))
+        return sorted((i for i in cand if q in self.low[i]), key=self.low.get)
+
+    def search(self, q: str, limit: int = 20, allowed: Optional[set] = None) -> List[str]:
+        q = q.strip().lower()
+        keep = (lambda i: i in allowed) if allowed is not None else (lambda i: True)
+        hits = self.contains(q)
+        words = [i for i in hits if any(wd.startswith(q) for wd in self.low[i].split())]
+        ranked = [i for i in dict.fromkeys(self.prefix(q) + words + hits) if keep(i)]
+        if not ranked and len(q) >= 3:                      # typo → fuzzy
+            pool = {i for j in range(len(q) - 2) for i in self.grams.get(q[j:j + 3], ())}
+            pool = [self.low[i] for i in pool if keep(i)]
+            ranked = [i for n in difflib.get_close_matches(q, pool, n=limit, cutoff=0.6)
+                      for i in self.by_name[n]]
+        return [self.name[i] for i in ranked[:limit]]
+
+INDEX: Dict[str, NameIndex] = {}
+
+# Filter lists, id → (matches, last_seen); also the allowed sets for /search
+Stats = Dict[int, Tuple[int, Optional[datetime.date]]]
+EVENTS_IN:  Dict[str, Stats] = defaultdict(dict)                        # fmt → events
+TEAMS_IN:   Dict[Tuple[str, Optional[int]], Stats] = defaultdict(dict)  # (fmt, event_id|None) → batting teams
+PLAYERS_IN: Dict[int, Stats] = defaultdict(dict)                        # team id → batters
+
+def merge(into: Stats, key: int, matches: int, last: Optional[datetime.date]) -> None:
+    """Add one list entry; counts add up because a match has exactly one event."""
+    n, d = into.get(key, (0, None))
+    into[key] = (n + matches, max((x for x in (d, last) if x is not None), default=None))
+
+def load_lists() -> Tuple[Dict[str, Stats], Dict[Tuple[str, Optional[int]], Stats], Dict[int, Stats]]:
+    """
+    Dropdown lists from LISTS (build_summaries.py) or, failing that, from
+    `cube`, as fresh (EVENTS_IN, TEAMS_IN, PLAYERS_IN).
+    """
+    src = (f"read_parquet('{LISTS}')" if os.path.exists(LISTS)
+           else f"({facts.LISTS_SQL.format(cube='cube')})")
+    events_in, teams_in, players_in = defaultdict(dict), defaultdict(dict), defaultdict(dict)
+    for level, fmt, ev, tm, pl, n, last in db.execute(
+        f"SELECT level, match_type, event_id, team_id, player_id, matches, last_seen FROM {src}"
+    ).fetchall():
+        if level == "player":
+            if tm is not None and pl is not None:
+                players_in[tm][pl] = (n, last)
+        elif ev is None:                          # no event → only in the all-events lists
+            continue
+        elif level == "event":
+            events_in[fmt][ev] = (n, last)
+        else:
+            teams_in[(fmt, ev)][tm] = (n, last)
+            merge(teams_in[(fmt, None)], tm, n, last)
+    return events_in, teams_in, players_in
+
+def build_indexes() -> None:
+    """
+    Name indexes, dropdown lists and the match-up store, all built aside
+    and then swapped in together – requests during a reload see either the
+    old set or the new one.
+    """
+    global INDEX, EVENTS_IN, TEAMS_IN, PLAYERS_IN, MATCHUP_BY, MATCHUP_YEARS_BY
+    index = {dim: NameIndex(db.execute(f"SELECT id, name FROM {dim}").fetchall())
+             for dim in dims.DIMENSIONS}
+    lists, store = load_lists(), load_matchups()
+    INDEX, (EVENTS_IN, TEAMS_IN, PLAYERS_IN), (MATCHUP_BY, MATCHUP_YEARS_BY) = index, lists, store
+
+# ========================================================================== #
+# MATCH-UP STORE – sparse batter × bowler facts, in memory
+# ========================================================================== #
+class SparseIndex:
+    """
+    A table sorted on one id column plus id → (start, stop) offsets, so
+    rows() of a few ids is a handful of zero-copy slices – O(result size).
+    """
+    def __init__(self, t: pa.Table, key: str):
+        self.t = t.sort_by(key)
+        self.off: Dict[int, Tuple[int, int]] = {}
+        vc = pc.value_counts(self.t[key])
+        order = pc.sort_indices(vc.field("values"))            # runs in table order
+        start = 0
+        for i, n in zip(vc.field("values").take(order).to_pylist(),
+                        vc.field("counts").take(order).to_pylist()):
+            self.off[i] = (start, start + n)
+            start += n
+
+    def rows(self, ids: List[int]) -> pa.Table:
+        parts = [self.t.slice(a, b - a) for a, b in (self.off[i] for i in ids if i in self.off)]
+        return pa.concat_tables(parts) if parts else self.t.slice(0, 0)
+
+MATCHUP_BY: Dict[str, SparseIndex] = {}            # "batter" / "bowler" → index
+MATCHUP_YEARS_BY: Dict[str, SparseIndex] = {}      # same, over the running totals
+
+def compact(t: pa.Table) -> pa.Table:
+    return t.set_column(t.column_names.index("match_type"), "match_type",
+                        pc.dictionary_encode(t["match_type"]))
+
+def load_matchups() -> Tuple[Dict[str, SparseIndex], Dict[str, SparseIndex]]:
+    """
+    The store from MATCHUPS (build_summaries.py) or, failing that, from
+    `balls`; its running totals from MATCHUP_YEARS or, failing that, the
+    store.  Returns fresh (MATCHUP_BY, MATCHUP_YEARS_BY).
+    """
+    src = (f"SELECT * FROM read_parquet('{MATCHUPS}')" if glob.glob(MATCHUPS)
+           else facts.matchup_sql("balls"))
+    t = db.execute(f"SELECT * EXCLUDE (season) FROM ({src})").fetch_arrow_table()
+    if os.path.exists(MATCHUP_YEARS):
+        y = db.execute(f"SELECT * FROM read_parquet('{MATCHUP_YEARS}')").fetch_arrow_table()
+    else:
+        db.register("_matchups", t)
+        try:
+            y = db.execute(facts.MATCHUP_YEARS_SQL.format(matchups="_matchups")).fetch_arrow_table()
+        finally:
+            db.unregister("_matchups")
+    t, y = compact(t), compact(y)
+    return ({key: SparseIndex(t, f"{key}_id") for key in ("batter", "bowler")},
+            {key: SparseIndex(y, f"{key}_id") for key in ("batter", "bowler")})
+
+# ========================================================================== #
+# LIFECYCLE – background warm-up, /healthz, /readyz
+# ========================================================================== #
+# The server starts answering at once; the warm-up runs on a thread and,
+# until it is done, everything but the probes (and /metrics) gets 503 +
+# Retry-After.  Stages: load (load_data), indexes (build_indexes), prime
+# (PRIME's hot queries per format, through the endpoints so results land in
+# the cache and DuckDB has the columns in memory).
+#
+# The same thread then watches dataset_version() every VERSION_EVERY
+# seconds.  When an ingest / summary build changes it, load and indexes run
+# again (each swaps its results in whole), and only then is the result
+# cache dropped and re-primed – it never refills from stale tables.
+PRIME = (("/batting", {"limit": 25}),   # Home: Top 25 batters, last 3 seasons
+         ("/bowling", {}))               # Bowlers: every bowler, last 3 seasons
+OPEN_PATHS = {"/healthz", "/readyz", "/metrics", "/docs", "/openapi.json"}
+
+def prime() -> None:
+    for fmt in FORMATS:
+        if fmt not in EVENTS_IN:                  # no data for this format
+            continue
+        list_events(fmt)
+        for path, params in PRIME:
+            try:
+                BATCHABLE[path](fmt=fmt, **params)
+            except HTTPException:
+                pass
+
+class Warmup:
+    """
+    Runs the startup stages, recording seconds per stage for /readyz, then
+    (watch) reloads whenever the dataset on disk changes.
+    """
+    STAGES = (("load", load_data), ("indexes", build_indexes), ("prime", prime))
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.secs: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.version: Optional[str] = None
+        self.reloads = 0
+
+    def stages(self, names: Tuple[str, ...]) -> Dict[str, float]:
+        secs = {}
+        for name, fn in self.STAGES:
+            if name in names:
+                t0 = time.perf_counter()
+                fn()
+                secs[name] = round(time.perf_counter() - t0, 3)
+        return secs
+
+    def run(self) -> None:
+        try:
+            self.version = dataset_version()      # before loading: a change mid-load reloads
+            self.secs = self.stages(("load", "indexes", "prime"))
+            self.ready.set()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+
+    def reload(self) -> None:
+        """New data on disk: tables + in-memory indexes first, then drop and re-prime the cache."""
+        self.version = dataset_version()
+        self.stages(("load", "indexes"))
+        CACHE.clear()
+        self.stages(("prime",))
+        self.reloads += 1
+
+    def watch(self) -> None:
+        while self.error is None:
+            time.sleep(VERSION_EVERY)
+            try:
+                changed = dataset_version() != self.version
+            except OSError:                       # file swapped mid-scan by an ingest → next tick
+                traceback.print_exc()
+                continue
+            if changed:
+                try:
+                    self.reload()
+                except Exception as e:            # half-swapped state → fail liveness, restart
+                    self.error = f"reload: {type(e).__name__}: {e}"
+                    traceback.print_exc()
+
+    def serve(self) -> None:
+        self.run()
+        self.watch()
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready.is_set(), "error": self.error, "reloads": self.reloads,
+                "stages": dict(self.secs), "total_s": round(sum(self.secs.values()), 3)}
+
+WARMUP = Warmup()
+
+def _startup() -> None:
+    """The whole warm-up, blocking (benchmarks); the server runs it in the background."""
+    WARMUP.run()
+    if WARMUP.error:
+        raise RuntimeError(WARMUP.error)
+
+@app.on_event("startup")
+def _start_warmup() -> None:
+    threading.Thread(target=WARMUP.serve, name="warmup", daemon=True).start()
+
+@app.middleware("http")
+async def gate(request: Request, call_next):
+    """503 + Retry-After for everything but the probes until the warm-up is done."""
+    if not WARMUP.ready.is_set() and request.url.path not in OPEN_PATHS:
+        return JSONResponse({"detail": "warming up"}, status_code=503,
+                            headers={"Retry-After": "2"})
+    return await call_next(request)
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up (500 once the warm-up has failed – restart it)."""
+    if WARMUP.error:
+        return JSONResponse({"status": "failed", "error": WARMUP.error}, status_code=500)
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 once warm, 503 before; with seconds per warm-up stage."""
+    return JSONResponse(WARMUP.status(), status_code=200 if WARMUP.ready.is_set() else 503)
+
+@app.get("/search/players")
+def search_players(query: str = "", limit: int = 20):
+    return [{"name": n} for n in INDEX["players"].search(query, limit)]
+
+@app.get("/search/venues")
+def search_venues(query: str = "", limit: int = 20):
+    return [{"name": n} for n in INDEX["venues"].search(query, limit)]
+
+@app.get("/search/events")
+def search_events(query: str = "", match_type: Optional[str] = None, limit: int = 20):
+    allowed = EVENTS_IN.get(match_type, set()) if match_type else None
+    return [{"name": n} for n in INDEX["events"].search(query, limit, allowed)]
+
+@app.get("/search/teams")
+def search_teams(query: str = "", match_type: Optional[str] = None,
+                 event: Optional[str] = None, limit: int = 20):
+    allowed = None
+    if match_type:
+        evs = INDEX["events"].exact(event) if event else [None]
+        allowed = set().union(*(TEAMS_IN.get((match_type, e), set()) for e in evs))
+    return [{"name": n} for n in INDEX["teams"].search(query, limit, allowed)]
+
+# ========================================================================== #
+# RESPONSE CACHE
+# ========================================================================== #
+def dataset_version() -> str:
+    """Deliveries + dims + summary Parquet fingerprint; changes after an ingest."""
+    files = sorted(glob.glob(os.path.join(PARQ_DIR, "**", "*.parquet"), recursive=True))
+    return source_stamp() + "|" + "|".join(
+        f"{f}:{os.path.getsize(f)}:{os.stat(f).st_mtime_ns}" for f in files)
+
+class ResultCache:
+    """
+    LRU + TTL over endpoint results, capped at max_bytes (Arrow size of the
+    stored tables).  Negative (404) results are cached too.  clear() drops
+    everything once a reload has swapped in new data (Warmup.reload); a
+    result computed before that (put with an older generation) is discarded.
+    """
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl, self.max_bytes = ttl, max_bytes
+        self.data: "OrderedDict[tuple, Tuple[float, int, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear(); self.bytes = 0
+            self.generation += 1
+            self.invalidations += 1
+
+    def get(self, key: tuple) -> Tuple[bool, Any]:
+        with self.lock:
+            hit = self.data.get(key)
+            if hit is None or hit[0] < time.monotonic():
+                if hit is not None:                       # expired
+                    self.bytes -= hit[1]; del self.data[key]
+                self.misses += 1
+                return False, None
+            self.data.move_to_end(key)
+            self.hits += 1
+            return True, hit[2]
+
+    def put(self, key: tuple, value: Any, generation: int) -> None:
+        size = (value.nbytes if isinstance(value, pa.Table) else
+                sum(t.nbytes for t in value.values()) if isinstance(value, dict) else 64)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if generation != self.generation:         # computed from pre-reload data
+                return
+            if key in self.data:
+                self.bytes -= self.data.pop(key)[1]
+            self.data[key] = (time.monotonic() + self.ttl, size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, old, _) = self.data.popitem(last=False)
+                self.bytes -= old
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 4) if total else None,
+                    "entries": len(self.data), "bytes": self.bytes,
+                    "max_bytes": self.max_bytes, "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+CACHE = ResultCache(CACHE_TTL, CACHE_MAX_BYTES)
+
+CSV_PARAMS = {"players", "bowlers"}          # order-insensitive name lists
+
+def norm(k: str, v: Any) -> Any:
+    """Cache-key form of a query value: trimmed; CSV lists sorted + de-duplicated."""
+    if not isinstance(v, str):
+        return v
+    if k in CSV_PARAMS:
+        return ",".join(sorted({p.strip() for p in v.split(",") if p.strip()}))
+    return v.strip()
+
+def cached(fn):
+    """Serve `fn` from CACHE, keyed on its normalised, defaults-applied arguments."""
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if STREAMING.get():                       # lazy, single-use result – never cached
+            return fn(*args, **kwargs)
+        bound = sig.bind(*args, **kwargs); bound.apply_defaults()
+        key = (fn.__name__,) + tuple((k, norm(k, v)) for k, v in sorted(bound.arguments.items()))
+        gen = CACHE.generation
+        hit, value = CACHE.get(key)
+        if not hit:
+            try:
+                value = fn(*args, **kwargs)
+            except HTTPException as e:
+                if e.status_code != 404: raise
+                value = e
+            CACHE.put(key, value, gen)
+        if isinstance(value, HTTPException):
+            raise value
+        return value
+    return wrapper
+
+@app.get("/cache/stats")
+def cache_stats(): return CACHE.stats()
+
+# ========================================================================== #
+# QUERY POOL – bounded executor for the analytic endpoints
+# ========================================================================== #
+class QueryPool:
+    """
+    `workers` threads run endpoint bodies; at most `max_queue` calls may wait
+    for one, beyond that run() raises 503 instead of piling up requests.
+    """
+    def __init__(self, workers: int, max_queue: int):
+        self.workers, self.max_queue = workers, max_queue
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="query")
+        self.lock = threading.Lock()
+        self.running = self.waiting = self.peak_waiting = 0
+        self.completed = self.rejected = 0
+        self.wait_s = self.run_s = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(503, "query queue full", headers={"Retry-After": "1"})
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+        queued = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self.lock:
+                self.waiting -= 1; self.running += 1
+                self.wait_s += started - queued
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1; self.completed += 1
+                    self.run_s += time.perf_counter() - started
+
+        ctx = contextvars.copy_context()              # the request's TRACE follows the job
+        return await asyncio.get_running_loop().run_in_executor(self.executor, ctx.run, job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            n = self.completed
+            return {"workers": self.workers, "max_queue": self.max_queue,
+                    "running": self.running, "waiting": self.waiting,
+                    "peak_waiting": self.peak_waiting, "completed": n,
+                    "rejected": self.rejected,
+                    "avg_wait_ms": round(1000 * self.wait_s / n, 2) if n else None,
+                    "avg_run_ms":  round(1000 * self.run_s / n, 2) if n else None}
+
+POOL = QueryPool(QUERY_WORKERS, QUERY_QUEUE)
+
+def pooled(fn):
+    """Async endpoint running `fn` on POOL; the plain function stays at .sync."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await POOL.run(fn, *args, **kwargs)
+    wrapper.sync = fn
+    return wrapper
+
+@app.get("/pool/stats")
+def pool_stats(): return POOL.stats()
+
+# ========================================================================== #
+# INSTRUMENTATION – request / query timings, slow-query log, /metrics
+# ========================================================================== #
+class Histogram:
+    """Prometheus-style latency histogram (seconds, cumulative on export)."""
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)      # last = +Inf
+        self.sum = 0.0
+
+    def observe(self, secs: float) -> None:
+        self.counts[bisect_left(self.BUCKETS, secs)] += 1
+        self.sum += secs
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """Named histograms and counters, keyed by label set; rendered by /metrics."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hists: Dict[str, Dict[Labels, Histogram]] = defaultdict(lambda: defaultdict(Histogram))
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, name: str, secs: float, **labels: str) -> None:
+        with self.lock:
+            self.hists[name][tuple(sorted(labels.items()))].observe(secs)
+
+    def inc(self, name: str, v: float = 1, **labels: str) -> None:
+        with self.lock:
+            self.counters[name][tuple(sorted(labels.items()))] += v
+
+    def render(self) -> str:
+        def lbl(labels, *extra) -> str:
+            kv = [*labels, *extra]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in kv) + "}" if kv else ""
+        out = []
+        with self.lock:
+            for name, series in sorted(self.hists.items()):
+                out.append(f"# TYPE {name} histogram")
+                for labels, h in sorted(series.items()):
+                    acc = 0
+                    for le, n in zip((*Histogram.BUCKETS, "+Inf"), h.counts):
+                        acc += n
+                        out.append(f"{name}_bucket{lbl(labels, ('le', le))} {acc}")
+                    out.append(f"{name}_sum{lbl(labels)} {h.sum:.6f}")
+                    out.append(f"{name}_count{lbl(labels)} {acc}")
+            for name, series in sorted(self.counters.items()):
+                out.append(f"# TYPE {name} counter")
+                out.extend(f"{name}{lbl(labels)} {v:g}" for labels, v in sorted(series.items()))
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+STAGES  = ("execute", "fetch", "render")
+
+# Per-request stage totals; set by the middleware, carried into pool threads.
+TRACE: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("trace", default=None)
+_slow_lock = threading.Lock()
+
+def spent(stage: str, secs: float) -> None:
+    trace = TRACE.get()
+    if trace is not None:
+        trace[stage] += secs
+
+def profile_summary() -> Optional[Dict[str, Any]]:
+    """Latency, rows returned and rows scanned by each scan operator from this thread's profile."""
+    try:
+        with open(_local.profile) as f:
+            prof = json.load(f)
+    except (AttributeError, OSError, ValueError):
+        return None
+    scans: Dict[str, int] = defaultdict(int)
+    def walk(node):
+        op = str(node.get("operator_type") or node.get("name") or "")
+        if "SCAN" in op or "READ" in op:
+            scans[op] += int(node.get("operator_cardinality", node.get("cardinality", 0)) or 0)
+        for child in node.get("children", []):
+            walk(child)
+    walk(prof)
+    return {"latency": prof.get("latency", prof.get("operator_timing")),
+            "rows_returned": prof.get("rows_returned", prof.get("cumulative_cardinality")),
+            "rows_scanned": dict(scans)}
+
+def query(name: str, sql: str, params: Any = (), *,
+          cur: Optional[duckdb.DuckDBPyConnection] = None,
+          **arrow: pa.Table) -> Union[duckdb.DuckDBPyConnection, pa.Table]:
+    """
+    con().execute(sql, params) (or on `cur`), timed: cricket_query_seconds{query=name},
+    the request's "execute" stage, and a SLOW_LOG line when ≥ SLOW_MS.
+    Keyword Arrow tables are visible to the SQL under their keyword; the
+    result then comes back already fetched, as results stream lazily and
+    would lose their input once the tables are unregistered.
+    """
+    c, t0 = cur or con(), time.perf_counter()
+    for k, t in arrow.items():
+        c.register(k, t)
+    try:
+        cur = c.execute(sql, params)
+        if arrow:
+            cur = cur.fetch_arrow_table()
+    finally:
+        for k in arrow:
+            c.unregister(k)
+    secs = time.perf_counter() - t0
+    METRICS.observe("cricket_query_seconds", secs, query=name)
+    spent("execute", secs)
+    if secs * 1000 >= SLOW_MS:
+        METRICS.inc("cricket_slow_queries_total", query=name)
+        trace = TRACE.get() or {}
+        entry = {"ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+                 "path": trace.get("path"), "query": name, "ms": round(secs * 1000, 2),
+                 "params": list(params), "sql": " ".join(sql.split())}
+        if PROFILE:
+            entry["profile"] = profile_summary()
+        with _slow_lock, open(SLOW_LOG, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+    return cur
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """Per-route latency + stage histograms, status counters, Server-Timing header."""
+    trace = {"path": request.url.path, **dict.fromkeys(STAGES, 0.0)}
+    token = TRACE.set(trace)
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        TRACE.reset(token)
+    secs = time.perf_counter() - t0
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")        # route template: bounded label set
+    METRICS.observe("cricket_request_seconds", secs, path=path)
+    METRICS.inc("cricket_requests_total", path=path, status=str(response.status_code))
+    for stage in STAGES:
+        if trace[stage]:
+            METRICS.observe("cricket_stage_seconds", trace[stage], path=path, stage=stage)
+    response.headers["Server-Timing"] = ", ".join(
+        f"{st};dur={trace[st] * 1000:.1f}" for st in STAGES) + f", total;dur={secs * 1000:.1f}"
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_text():
+    """Prometheus text exposition: the histograms above plus cache / pool gauges."""
+    gauges = [f"cricket_{prefix}_{k} {v}"
+              for prefix, stats in (("cache", CACHE.stats()), ("pool", POOL.stats()))
+              for k, v in stats.items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    gauges += [f"cricket_ready {int(WARMUP.ready.is_set())}"] + [
+        f'cricket_warmup_seconds{{stage="{st}"}} {secs}' for st, secs in WARMUP.secs.items()]
+    return METRICS.render() + "\n".join(gauges) + "\n"
+
+# ========================================================================== #
+# RESPONSE FORMATS – JSON / Arrow IPC / Parquet
+# ========================================================================== #
+ARROW   = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+NDJSON  = "application/x-ndjson"
+
+def nest(result: Dict[str, pa.Table]) -> pa.Table:
+    """{"batting": t1, "bowling": t2} → one row, one list<struct> column per key."""
+    cols = {}
+    for k, t in result.items():
+        structs = t.to_struct_array().combine_chunks()      # one StructArray, even at 0 rows
+        cols[k] = pa.ListArray.from_arrays(pa.array([0, t.num_rows], pa.int32()), structs)
+    return pa.table(cols)
+
+def ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(r, default=str) + "\n" for r in rows).encode()
+
+def render(result, accept: str):
+    """
+    Endpoint result (Arrow table or dict of them) → body in the negotiated
+    format.  Anything else (list / search results) is already JSON-able and
+    comes back unchanged.
+    """
+    if not (isinstance(result, pa.Table) or isinstance(result, dict) and result
+            and all(isinstance(t, pa.Table) for t in result.values())):
+        return result
+    media = ARROW if ARROW in accept else PARQUET if PARQUET in accept else None
+    if NDJSON in accept and isinstance(result, pa.Table):
+        return Response(ndjson(records(result)), media_type=NDJSON)
+    if media is None:
+        if isinstance(result, pa.Table):
+            return records(result)
+        return {k: records(t) for k, t in result.items()}
+    t, sink = result if isinstance(result, pa.Table) else nest(result), pa.BufferOutputStream()
+    if media == ARROW:
+        with pa.ipc.new_stream(sink, t.schema) as wr:
+            wr.write_table(t)
+    else:
+        pq.write_table(t, sink, compression="zstd")
+    return Response(sink.getvalue().to_pybytes(), media_type=media)
+
+def negotiated(fn):
+    """Endpoint answering `fn`'s Arrow result per the request's Accept header."""
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, request: Request, **kwargs):
+        accept = request.headers.get("accept", "")
+        token = STREAMING.set(NDJSON in accept)       # copied into the pool thread
+        try:
+            result = await fn(*args, **kwargs)
+        finally:
+            STREAMING.reset(token)
+        if isinstance(result, Stream):
+            return StreamingResponse(result.lines(), media_type=NDJSON)
+        t0 = time.perf_counter()
+        body = render(result, accept)
+        if not isinstance(body, Response):            # encode JSON here so it is timed
+            body = JSONResponse(jsonable_encoder(body))
+        spent("render", time.perf_counter() - t0)
+        nxt = isinstance(result, pa.Table) and (result.schema.metadata or {}).get(NEXT)
+        if nxt:
+            body.headers["X-Next-Cursor"] = nxt.decode()
+        return body
+    wrapper.__signature__ = sig.replace(parameters=[
+        *sig.parameters.values(),
+        inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)])
+    return wrapper
+
+# ========================================================================== #
+# PAGINATION – top-K, keyset cursors, NDJSON streaming
+# ========================================================================== #
+# paged() takes endpoint SQL with two extra columns, _sort and _key (a
+# unique tie-break), and no ORDER BY.  A cursor is the last row's
+# (_sort, _key), so the next page is a WHERE on the sort order, not an
+# OFFSET re-reading every earlier row.
+NEXT        = b"next_cursor"           # schema metadata key → X-Next-Cursor
+STREAM_ROWS = 2048                     # rows per DuckDB batch while streaming
+
+STREAMING: contextvars.ContextVar[bool] = contextvars.ContextVar("streaming", default=False)
+
+def encode_cursor(sort: Any, key: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, key]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    try:
+        sort, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "bad cursor")
+    if not all(isinstance(v, (int, float, str)) for v in (sort, key)):
+        raise HTTPException(400, "bad cursor")
+    return sort, key
+
+@contextlib.contextmanager
+def buffered():
+    """Endpoint calls inside run to completion even on a streaming request."""
+    token = STREAMING.set(False)
+    try:
+        yield
+    finally:
+        STREAMING.reset(token)
+
+class Stream:
+    """
+    A page sent as NDJSON batch by batch while DuckDB produces it.  Opened by
+    paged() inside the pool job – so admitted (or 503'd) like any query, and
+    404 when there is not a single row – then every further batch is pulled
+    on the pool's threads as well, never on the server's own.
+    """
+    def __init__(self, name: str, sql: str, params: tuple, limit: Optional[int]):
+        self.limit = limit
+        self.c = db.cursor()                   # own cursor: outlives the pool job
+        try:
+            self.reader = query(name, sql, params, cur=self.c).fetch_record_batch(STREAM_ROWS)
+            self.first = self.next_batch()
+        except BaseException:
+            self.c.close()
+            raise
+        if self.first is None:
+            self.c.close()
+            raise HTTPException(404, "No rows")
+
+    def next_batch(self) -> Optional[pa.RecordBatch]:
+        """The next non-empty batch; None once DuckDB is done."""
+        while True:
+            try:
+                batch = self.reader.read_next_batch()
+            except StopIteration:
+                return None
+            if batch.num_rows:
+                return batch
+
+    async def lines(self):
+        loop = asyncio.get_running_loop()
+        try:
+            sent, last, batch = 0, None, self.first
+            while batch is not None:
+                out = []
+                for row in batch.to_pylist():
+                    if sent == self.limit:     # the look-ahead row: there is a next page
+                        out.append({"next_cursor": last})
+                        break
+                    last = encode_cursor(row.pop("_sort"), row.pop("_key"))
+                    out.append({k: ok(v) for k, v in row.items()})
+                    sent += 1
+                yield ndjson(out)
+                if sent == self.limit:
+                    break
+                batch = await loop.run_in_executor(POOL.executor, self.next_batch)
+        finally:
+            self.c.close()
+
+def paged(name: str, sql: str, params: tuple, cursor: str, limit: Optional[int],
+          desc: bool = True):
+    """
+    One page of `sql`: ORDER BY _sort [DESC], _key, rows after `cursor`,
+    LIMIT limit + 1 (the extra row says whether a next page exists).  The
+    Arrow table carries the next cursor in its schema metadata; on an NDJSON
+    request a Stream comes back instead.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(400, "limit must be ≥ 1")
+    where, extra = "TRUE", ()
+    if cursor:
+        sort, key = decode_cursor(cursor)
+        where = f"(_sort {'<' if desc else '>'} ? OR (_sort = ? AND _key > ?))"
+        extra = (sort, sort, key)
+    sql = (f"SELECT * FROM ({sql}) WHERE {where} "
+           f"ORDER BY _sort {'DESC' if desc else 'ASC'}, _key" + (" LIMIT ?" if limit else ""))
+    params = (*params, *extra, *((limit + 1,) if limit else ()))
+    if STREAMING.get():
+        return Stream(name, sql, params, limit)
+    t = table(query(name, sql, params))
+    nxt = None
+    if limit and t.num_rows > limit:
+        t = t.slice(0, limit)
+        nxt = encode_cursor(t["_sort"][-1].as_py(), t["_key"][-1].as_py())
+    t = t.select([c for c in t.column_names if c not in ("_sort", "_key")])
+    return t.replace_schema_metadata({NEXT: nxt}) if nxt else t
 
 # ========================================================================== #
 # LIST ENDPOINTS
@@ -52,47 +1145,44 @@ def season(last: int) -> str:
 @app.get("/lists/formats")
 def list_formats(): return FORMATS
 
+# Served from the in-memory EVENTS_IN / TEAMS_IN / PLAYERS_IN (load_lists);
+# entries are {"name", "matches", "last_seen"}, sorted by name.
+def listing(dim: str, stats: Stats) -> List[Dict[str, Any]]:
+    names = INDEX[dim].name
+    data = sorted(({"name": names[i], "matches": n, "last_seen": d}
+                   for i, (n, d) in stats.items() if i in names), key=lambda r: r["name"])
+    if not data:
+        raise HTTPException(404, "No rows")
+    return data
+
+def merged(parts) -> Stats:
+    out: Stats = {}
+    for stats in parts:
+        for i, (n, d) in stats.items():
+            merge(out, i, n, d)
+    return out
+
 @app.get("/lists/events")
 def list_events(fmt: str):
     if fmt not in FORMATS: raise HTTPException(400, "bad format")
-    cur = db.execute(
-        f"SELECT DISTINCT event_name AS name "
-        f"FROM read_parquet('{BALLS}') "
-        "WHERE match_type = ? ORDER BY 1",
-        (fmt,),
-    )
-    return rows(cur)
+    return listing("events", EVENTS_IN.get(fmt, {}))
 
 @app.get("/lists/teams")
 def list_teams(fmt: str, event: str = ""):
-    sql = (
-        f"SELECT DISTINCT batting_team AS name "
-        f"FROM read_parquet('{BALLS}') "
-        "WHERE match_type = ? AND " + w("event_name", event) + " ORDER BY 1"
-    )
-
-    params: list[Any] = [fmt]
-    if event:                         # only add when event filter used
-        params.append(event)
-
-    cur = db.execute(sql, tuple(params))
-    return rows(cur)
-
+    evs = INDEX["events"].contains(event) if event else [None]      # substring, like w()
+    return listing("teams", merged(TEAMS_IN.get((fmt, e), {}) for e in evs))
 
 @app.get("/lists/players")
 def list_players(team: str):
-    cur = db.execute(
-        f"SELECT DISTINCT batter AS name "
-        f"FROM read_parquet('{BALLS}') "
-        "WHERE batting_team = ? ORDER BY 1",
-        (team,),
-    )
-    return rows(cur)
+    return listing("players", merged(PLAYERS_IN.get(t, {}) for t in INDEX["teams"].exact(team)))
 
 # ========================================================================== #
 # BATTING SUMMARY + DRILL-DOWN
 # ========================================================================== #
 @app.get("/batting")
+@negotiated
+@pooled
+@cached
 def batting(
     fmt: str,
     last: int = 3,
@@ -103,178 +1193,289 @@ def batting(
     venue: str = "",
     innings: Optional[int] = None,
     players: str = "",          # CSV, substring match
+    limit: Optional[int] = None,   # top-K by runs
+    cursor: str = "",           # X-Next-Cursor of the previous page
 ):
     plist = [p.strip() for p in players.split(",") if p.strip()]
-    sql = f"""
-    WITH f AS (
-      SELECT *
-      FROM read_parquet('{BALLS}')
+    if not (event or opp or venue or innings):     # window over the running totals
+        per_team = facts.window_sql(
+            "player_years", facts.PLAYER_SERIES,
+            ["bat_inns", "bat_runs", "outs", "bat_balls", "fours", "sixes"], cutoff_year(last),
+            f"match_type = ? AND {w('batting_team', team, 'team_id')} "
+            f"AND {w('batter', plist, 'player_id') if plist else 'TRUE'}")
+        agg = f"""
+      SELECT
+        player_id                         batter_id,
+        SUM(bat_inns)::BIGINT             inns,
+        SUM(bat_runs)::BIGINT             runs,
+        NULLIF(SUM(outs), 0)::BIGINT      outs,
+        SUM(bat_balls)::BIGINT            balls,
+        SUM(fours)::BIGINT                fours,
+        SUM(sixes)::BIGINT                sixes
+      FROM ({per_team})
+      GROUP BY player_id
+      HAVING inns >= ? AND inns > 0"""
+    else:
+        agg = f"""
+      SELECT
+        batter_id,
+        COUNT(DISTINCT match_id)          inns,
+        SUM(bat_runs)::BIGINT             runs,
+        NULLIF(SUM(outs), 0)::BIGINT      outs,
+        SUM(bat_balls)::BIGINT            balls,
+        SUM(fours)::BIGINT                fours,
+        SUM(sixes)::BIGINT                sixes
+      FROM (SELECT *, player_id AS batter_id FROM cube WHERE bat_balls > 0)
       WHERE match_type = ?
         AND {w('event_name',   event)}
         AND {w('batting_team', team)}
         AND {w('bowling_team', opp)}
         AND {w('venue',        venue)}
-        AND {w('batter', '|'.join(plist)) if plist else 'TRUE'}
+        AND {w('batter', plist) if plist else 'TRUE'}
         AND ({'innings_number = ' + str(innings) if innings else 'TRUE'})
         AND ({season(last)})
+      GROUP BY batter_id
+      HAVING inns >= ?"""
+    sql = f"""
+    WITH agg AS ({agg}
     )
-    SELECT
-      batter,
-      COUNT(DISTINCT match_id) inns,
-      SUM(runs_batter)         runs,
-      SUM(CASE WHEN wicket_type IS NOT NULL
-                AND player_out = batter THEN 1 END) outs,
-      COUNT(*)                 balls,
-      SUM(is_boundary_4::INT)  fours,
-      SUM(is_boundary_6::INT)  sixes
-    FROM f
-    GROUP BY batter
-    HAVING inns >= ?
-    ORDER BY runs DESC
-    """
-    params: List[Any] = [fmt]
-    params += [event] if event else []
-    params += [team] if team else []
-    params += [opp] if opp else []
-    params += [venue] if venue else []
-    if plist: params.append("|".join(plist))
-    params.append(min_inns)
-    data = rows(db.execute(sql, tuple(params)))
-    for r in data:
-        r["avg"] = ok(round(r["runs"] / r["outs"], 2) if r["outs"] else None)
-        r["sr"]  = round(100 * r["runs"] / r["balls"], 2)
-        r["bp4"] = ok(round(r["balls"] / r["fours"], 1) if r["fours"] else None)
-        r["bp6"] = ok(round(r["balls"] / r["sixes"], 1) if r["sixes"] else None)
-        r["%4s"] = ok(round(100 * r["fours"] / r["balls"], 2))
-        r["%6s"] = ok(round(100 * r["sixes"] / r["balls"], 2))
-    return data
+    SELECT p.name AS batter, agg.* EXCLUDE (batter_id),
+           {metrics.project(metrics.BATTING)},
+           agg.runs AS _sort, agg.batter_id AS _key
+    FROM agg JOIN players p ON p.id = agg.batter_id
+    """
+    return paged("batting", sql, (fmt, min_inns), cursor, limit)
 
 @app.get("/batting/drill")
-def batting_drill(fmt: str, batter: str, **base_filters):
-    """Per-match breakdown for a single batter (inherits same filters)."""
-    base_filters["players"] = batter
-    rows_all = batting(fmt=fmt, **base_filters)
-    if not rows_all: raise HTTPException(404, "no such player in filter set")
-
-    cur = db.execute(
-        f"""SELECT match_id, bowling_team AS opponent, venue,
-                   SUM(runs_batter) AS runs,
-                   COUNT(*)         AS balls,
-                   SUM(is_boundary_4::INT) fours,
-                   SUM(is_boundary_6::INT) sixes
-            FROM read_parquet('{BALLS}')
-            WHERE match_type = ?
-              AND batter ILIKE ?
-              AND ({season(base_filters.get('last', 3))})
-            GROUP BY match_id, bowling_team, venue
-            ORDER BY match_id""",
-        (fmt, f"%{batter}%"),
+@negotiated
+@pooled
+@cached
+def batting_drill(fmt: str, batter: str, last: int = 3,
+                  limit: Optional[int] = None, cursor: str = ""):
+    """Per-match breakdown for a single batter (same look-back as /batting), by match id."""
+    with buffered():
+        batting.sync(fmt=fmt, last=last, players=batter)   # 404 unless in the filter set
+
+    return paged(
+        "batting_drill",
+        f"""WITH m AS (
+              SELECT match_id, bowling_team_id, venue_id,
+                     SUM(runs_batter)::BIGINT AS runs,
+                     COUNT(*)                 AS balls,
+                     SUM(is_boundary_4::INT)::BIGINT fours,
+                     SUM(is_boundary_6::INT)::BIGINT sixes
+              FROM {balls_src(fmt, last)}
+              WHERE match_type = ?
+                AND {w('batter', batter)}
+                AND ({season(last)})
+              GROUP BY match_id, bowling_team_id, venue_id
+            )
+            SELECT m.match_id, t.name AS opponent, v.name AS venue,
+                   m.runs, m.balls, m.fours, m.sixes,
+                   m.match_id AS _sort, m.match_id AS _key
+            FROM m
+            JOIN teams  t ON t.id = m.bowling_team_id
+            JOIN venues v ON v.id = m.venue_id""",
+        (fmt,), cursor, limit, desc=False,
     )
-    return rows(cur)
 
 # ========================================================================== #
 # BOWLING SUMMARY
 # ========================================================================== #
 @app.get("/bowling")
+@negotiated
+@pooled
+@cached
 def bowling(fmt: str, last: int = 3, min_inns: int = 3,
             event: str = "", team: str = "", opp: str = "",
             venue: str = "", innings: Optional[int] = None,
-            bowlers: str = ""):
+            bowlers: str = "", limit: Optional[int] = None, cursor: str = ""):
     blist = [b.strip() for b in bowlers.split(",") if b.strip()]
-    sql = f"""
-    WITH f AS (
-      SELECT *
-      FROM read_parquet('{BALLS}')
+    if not (event or opp or venue or innings):     # window over the running totals
+        per_team = facts.window_sql(
+            "player_years", facts.PLAYER_SERIES,
+            ["bowl_inns", "bowl_balls", "runs_conceded", "wickets"], cutoff_year(last),
+            f"match_type = ? AND {w('bowling_team', team, 'team_id')} "
+            f"AND {w('bowler', blist, 'player_id') if blist else 'TRUE'}")
+        agg = f"""
+      SELECT player_id bowler_id, SUM(bowl_inns)::BIGINT inns, SUM(bowl_balls)::BIGINT balls,
+             SUM(runs_conceded)::BIGINT runs, NULLIF(SUM(wickets), 0)::BIGINT wkts
+      FROM ({per_team})
+      GROUP BY player_id HAVING inns >= ? AND inns > 0"""
+    else:
+        agg = f"""
+      SELECT bowler_id, COUNT(DISTINCT match_id) inns, SUM(bowl_balls)::BIGINT balls,
+             SUM(runs_conceded)::BIGINT runs, NULLIF(SUM(wickets), 0)::BIGINT wkts
+      FROM (SELECT *, player_id AS bowler_id FROM cube WHERE bowl_balls > 0)
       WHERE match_type = ?
         AND {w('event_name',    event)}
         AND {w('bowling_team',  team)}
         AND {w('batting_team',  opp)}
         AND {w('venue',         venue)}
-        AND {w('bowler', '|'.join(blist)) if blist else 'TRUE'}
+        AND {w('bowler', blist) if blist else 'TRUE'}
         AND ({'innings_number = ' + str(innings) if innings else 'TRUE'})
         AND ({season(last)})
-    ),
-    m AS (
-      SELECT match_id, bowler,
-             COUNT(*)        balls,
-             SUM(runs_total) runs,
-             SUM(CASE WHEN wicket_type IS NOT NULL
-                      AND bowler = ANY(string_split(player_out,','))
-                      THEN 1 END) wkts
-      FROM f GROUP BY 1,2
+      GROUP BY bowler_id HAVING inns >= ?"""
+    sql = f"""
+    WITH agg AS ({agg}
     )
-    SELECT bowler, COUNT(*) inns, SUM(balls) balls,
-           SUM(runs) runs, SUM(wkts) wkts
-    FROM m
-    GROUP BY bowler HAVING inns >= ?
-    ORDER BY wkts DESC
-    """
-    p=[fmt]; p+=[event] if event else []
-    p+=[team] if team else []; p+=[opp] if opp else []
-    p+=[venue] if venue else []; p+=[ "|".join(blist) ] if blist else []
-    p.append(min_inns)
-    data = rows(db.execute(sql, tuple(p)))
-    for r in data:
-        overs = r["balls"] / 6
-        r["econ"] = ok(round(r["runs"] / overs, 2))
-        r["sr"]   = ok(round(r["balls"] / r["wkts"], 1) if r["wkts"] else None)
-        r["avg"]  = ok(round(r["runs"] / r["wkts"], 2) if r["wkts"] else None)
-    return data
+    SELECT p.name AS bowler, agg.* EXCLUDE (bowler_id),
+           {metrics.project(metrics.BOWLING)},
+           COALESCE(agg.wkts, 0) AS _sort, agg.bowler_id AS _key
+    FROM agg JOIN players p ON p.id = agg.bowler_id
+    """
+    return paged("bowling", sql, (fmt, min_inns), cursor, limit)
 
 # ========================================================================== #
 # TEAM PHASE SUMMARY
 # ========================================================================== #
+# Point lookups: the summary files are sorted on (event, team) in small row
+# groups with min/max stats + bloom filters, so DuckDB reads one row group.
 @app.get("/team")
+@negotiated
+@pooled
+@cached
 def team(fmt: str, event: str, team: str):
-    bat = rows(db.execute(
-        f"SELECT * FROM read_parquet('{TEAM_BAT}') "
+    bat = table(query(
+        "team_batting",
+        f"SELECT * FROM {summary_src('team_phase_summary', fmt)} "
         "WHERE match_type=? AND event_name=? AND batting_team=?",
         (fmt, event, team)))
-    bowl = rows(db.execute(
-        f"SELECT * FROM read_parquet('{TEAM_BWL}') "
+    bowl = table(query(
+        "team_bowling",
+        f"SELECT * FROM {summary_src('team_bowling_phase_summary', fmt)} "
         "WHERE match_type=? AND event_name=? AND fielding_team=?",
         (fmt, event, team)))
     return {"batting": bat, "bowling": bowl}
 
 # ========================================================================== #
-# MATCH-UPS (batter vs bowler quick table)
+# MATCH-UPS – batter vs all bowlers, bowler vs all batters
 # ========================================================================== #
+# Both read only the named player's rows of the in-memory store: the
+# per-event rows (MATCHUP_BY) for an event filter, else the running totals
+# (MATCHUP_YEARS_BY), windowed per pair × sides before summing.
+MATCHUP_COLS = f"""
+    SUM(balls)::BIGINT                 AS balls,
+    SUM(runs)::BIGINT                  AS runs,
+    NULLIF(SUM(dismissals), 0)::BIGINT AS dismissals,
+    SUM(dots)::BIGINT                  AS dots,
+    SUM(fours)::BIGINT                 AS fours,
+    SUM(sixes)::BIGINT                 AS sixes,
+    {metrics.strike_rate("SUM(runs)", "SUM(legal)", 2)} AS sr"""
+
+def matchup_rows(key: str, player: str, event: str) -> pa.Table:
+    return (MATCHUP_BY if event else MATCHUP_YEARS_BY)[key].rows(INDEX["players"].contains(player))
+
+def matchup_sql(key: str, opp_col: str, opp: str, event: str, last: int) -> str:
+    if event:
+        src = f"""(
+      SELECT * FROM m
+      WHERE match_type = ?
+        AND {w(opp_col, opp)}
+        AND {w('event_name', event)}
+        AND ({season(last)}))"""
+    else:
+        src = "(" + facts.window_sql("m", facts.MATCHUP_SERIES, list(facts.MATCHUP_YEAR_COLS),
+                                     cutoff_year(last), f"match_type = ? AND {w(opp_col, opp)}") + ")"
+    return f"""
+    WITH agg AS (
+      SELECT {key}, {MATCHUP_COLS}
+      FROM {src}
+      GROUP BY {key}
+    )
+    SELECT p.name AS {key[:-3]}, agg.* EXCLUDE ({key})
+    FROM agg JOIN players p ON p.id = agg.{key}
+    ORDER BY balls DESC
+    """
+
 @app.get("/matchup")
+@negotiated
+@pooled
+@cached
 def matchup(
     fmt: str,
     batter: str,
     opp: str,
-    last: int = 3
+    last: int = 3,
+    event: str = "",
 ):
     """
     Returns one row per bowler who bowled to `batter` against `opp`
-    in the last N years, with balls, runs conceded, and dismissals.
-    """
-    sql = f"""
-    SELECT
-      bowler,
-      COUNT(*)                AS balls,
-      SUM(runs_batter)        AS runs,
-      SUM(
-        CASE
-          WHEN wicket_type IS NOT NULL
-            AND player_out = batter
-          THEN 1
-        END
-      )                        AS dismissals
-    FROM read_parquet('{BALLS}')
-    WHERE match_type = ?
-      AND {w('batter', batter)}
-      AND {w('bowling_team', opp)}
-      AND ({season(last)})
-    GROUP BY bowler
-    ORDER BY balls DESC
+    in the last N years, with balls, runs, dismissals, dots and boundaries.
     """
-    params: List[Any] = [fmt]
-    if batter:
-        params.append(batter)
-    if opp:
-        params.append(opp)
+    m = matchup_rows("batter", batter, event)
+    return table(query("matchup", matchup_sql("bowler_id", "bowling_team", opp, event, last),
+                       (fmt,), m=m))
 
-    data = rows(db.execute(sql, tuple(params)))
-    return data
+@app.get("/matchup/bowler")
+@negotiated
+@pooled
+@cached
+def matchup_bowler(fmt: str, bowler: str, opp: str = "", last: int = 3, event: str = ""):
+    """The reverse: one row per batter who faced `bowler` (batting for `opp`)."""
+    m = matchup_rows("bowler", bowler, event)
+    return table(query("matchup_bowler",
+                       matchup_sql("batter_id", "batting_team", opp, event, last), (fmt,), m=m))
+
+# ========================================================================== #
+# BATCH – several GETs in one round trip
+# ========================================================================== #
+MAX_BATCH = 16
+
+class SubQuery(BaseModel):
+    path: str                          # e.g. "/lists/teams"
+    params: Dict[str, Any] = {}
+
+class Batch(BaseModel):
+    queries: List[SubQuery]
+
+# path → plain (un-pooled, un-negotiated) endpoint function
+BATCHABLE = {
+    "/lists/formats": list_formats, "/lists/events": list_events,
+    "/lists/teams": list_teams,     "/lists/players": list_players,
+    "/search/players": search_players, "/search/venues": search_venues,
+    "/search/events": search_events,   "/search/teams": search_teams,
+    "/batting": batting.sync, "/batting/drill": batting_drill.sync,
+    "/bowling": bowling.sync, "/team": team.sync, "/matchup": matchup.sync,
+    "/matchup/bowler": matchup_bowler.sync,
+}
+
+def call(path: str, params: Dict[str, Any]) -> Any:
+    """Run one sub-query like its GET would: same params (ints coerced), JSON body."""
+    fn = BATCHABLE.get(path)
+    if fn is None:
+        raise HTTPException(404, f"{path} is not batchable")
+    sig, args = inspect.signature(fn), {}
+    for k, v in params.items():
+        p = sig.parameters.get(k)
+        if p is None:
+            raise HTTPException(400, f"unknown parameter {k!r}")
+        if v is not None and int in (p.annotation, *getattr(p.annotation, "__args__", ())):
+            try: v = int(v)
+            except (TypeError, ValueError): raise HTTPException(400, f"{k} must be an integer")
+        args[k] = v
+    try:
+        sig.bind(**args)
+    except TypeError as e:
+        raise HTTPException(400, str(e))
+    return render(fn(**args), "")
+
+async def run_one(q: SubQuery) -> Dict[str, Any]:
+    try:
+        return {"status": 200, "data": await POOL.run(call, q.path, q.params)}
+    except HTTPException as e:
+        return {"status": e.status_code, "detail": e.detail}
+    except Exception as e:                            # one bad query doesn't fail the batch
+        return {"status": 500, "detail": f"{type(e).__name__}: {e}"}
+
+@app.post("/batch")
+async def batch(body: Batch):
+    """
+    Runs every sub-query concurrently on the query pool and returns
+    {"results": [{"status", "data" | "detail"}, …]} in request order.  The
+    tables they read only change when a reload swaps in a new dataset, so
+    sub-queries see the same snapshot unless one lands in between.
+    """
+    if len(body.queries) > MAX_BATCH:
+        raise HTTPException(400, f"at most {MAX_BATCH} queries per batch")
+    return {"results": await asyncio.gather(*(run_one(q) for q in body.queries))}
@@ -0,0 +1,64 @@
+##############################################################################
+# Cricket Stats • dimension tables
+#  Every player / team / venue / event name ↔ compact INT id.
+#
+#  scripts/build_master_table.py stores deliveries with the *_id columns in
+#  ID_COLS and writes one `<dimension>.parquet` (id, name) per dimension into
+#  DIMS_DIR.  Ids are append-only, so they stay stable across incremental
+#  ingests.  Readers (api.py, build_summaries.py) join / group / filter on the
+#  ids and decode names only on output.
+##############################################################################
+import os
+
+DIMS_DIR = os.getenv("CRICKET_DIMS_DIR", "dims")
+
+DIMENSIONS = ("players", "teams", "venues", "events")
+
+# name column in the raw delivery rows → (id column stored instead, dimension)
+ID_COLS = {
+    "batter":       ("batter_id",       "players"),
+    "bowler":       ("bowler_id",       "players"),
+    "non_striker":  ("non_striker_id",  "players"),
+    "player_out":   ("player_out_id",   "players"),
+    "batting_team": ("batting_team_id", "teams"),
+    "bowling_team": ("bowling_team_id", "teams"),
+    "venue":        ("venue_id",        "venues"),
+    "event_name":   ("event_id",        "events"),
+}
+
+def dim_path(dim: str, dims_dir: str = DIMS_DIR) -> str:
+    return os.path.join(dims_dir, f"{dim}.parquet")
+
+def has_ids(con, src: str) -> bool:
+    """True when the deliveries behind `src` are already id-encoded."""
+    cols = {r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {src}").fetchall()}
+    return "batter_id" in cols
+
+def load(con, src: str, dims_dir: str = DIMS_DIR) -> bool:
+    """
+    Create tables players / teams / venues / events (id INT, name VARCHAR).
+    Id-encoded `src` → read them from dims_dir and return True.  Older
+    string-only Parquet → derive them from the names in `src` and return
+    False; wrap `src` in encoded() to attach the ids.
+    """
+    ids = has_ids(con, src)
+    for dim in DIMENSIONS:
+        if ids:
+            body = (f"SELECT id::INT AS id, name::VARCHAR AS name "
+                    f"FROM read_parquet('{dim_path(dim, dims_dir)}')")
+        else:
+            names = " UNION ".join(f"SELECT {col} AS name FROM {src}"
+                                   for col, (_, d) in ID_COLS.items() if d == dim)
+            body = (f"SELECT (row_number() OVER (ORDER BY name) - 1)::INT AS id, name "
+                    f"FROM (SELECT DISTINCT name FROM ({names}) WHERE name IS NOT NULL)")
+        con.execute(f"CREATE OR REPLACE TABLE {dim} AS {body} ORDER BY id")
+    return ids
+
+def encoded(src: str) -> str:
+    """String-layout deliveries → same relation with *_id columns instead of names."""
+    joins, ids = [], []
+    for i, (col, (id_col, dim)) in enumerate(ID_COLS.items()):
+        joins.append(f"LEFT JOIN {dim} d{i} ON d{i}.name = s.{col}")
+        ids.append(f"d{i}.id AS {id_col}")
+    return (f"(SELECT s.* EXCLUDE ({', '.join(ID_COLS)}), {', '.join(ids)} "
+            f"FROM {src} s {' '.join(joins)})")
@@ -0,0 +1,226 @@
+##############################################################################
+# Cricket Stats • precomputed fact tables
+#  SQL shared by scripts/build_summaries.py (writes them to Parquet) and
+#  api.py (serves from them, or rebuilds them from `balls` if missing).
+#
+#  deliveries ──▶ spells ──┬──▶ cube ──────┬──▶ lists   (match × innings × player)
+#                          │               └──▶ player_years  (player × team × year)
+#                          ├──▶ team_innings          (match × innings × teams)
+#                          └──▶ matchups ───────▶ matchup_years (pair × sides × year)
+#
+#  SPELL_SQL takes the id-keyed deliveries relation as {balls}; the others
+#  read {spells} / {cube} / {matchups}.  Only the first step touches every
+#  delivery.
+##############################################################################
+from typing import Dict, List, Optional
+
+# Dismissal kinds credited to the bowler
+BOWLER_WICKET = ("wicket_type IN ('bowled','caught','caught and bowled',"
+                 "'lbw','stumped','hit wicket')")
+
+# Phase windows reported by the team summaries: overs → last ball number
+PHASES = {6: 36, 10: 60, 12: 72, 15: 90}
+
+KEYS = ("season, season_year, match_type, event_id, venue_id, match_id, match_date, "
+        "innings_number, batting_team_id, bowling_team_id")
+
+# -------------------------------------------------------------- spells ----
+# One row per match × innings × batter × bowler × phase.  `phase` is the
+# smallest window in PHASES holding the delivery (NULL past the last one).
+_PHASE = " ".join(f"WHEN ball_number_absolute <= {b} THEN {o}" for o, b in PHASES.items())
+
+SPELL_SQL = f"""
+SELECT
+  replace(season::VARCHAR, '%2F', '/')          AS season,      -- hive dir 2013%2F14
+  CAST(substr(season::VARCHAR,1,4) AS SMALLINT) AS season_year,
+  match_type, event_id, venue_id, match_id, match_date, innings_number,
+  batting_team_id, bowling_team_id, batter_id, bowler_id,
+  (CASE {_PHASE} END)::TINYINT                  AS phase,
+
+  COUNT(*)::INT                                                        AS balls,
+  SUM(CASE WHEN extras_type = 'wides' THEN 0 ELSE 1 END)::INT          AS bat_legal,
+  SUM(CASE WHEN extras_type IN ('wides','no-balls') THEN 0 ELSE 1 END)::INT AS bowl_legal,
+  SUM(runs_batter)::INT                                                AS runs_batter,
+  SUM(runs_total)::INT                                                 AS runs_total,
+  SUM(is_boundary_4::INT)::INT                                         AS fours,
+  SUM(is_boundary_6::INT)::INT                                         AS sixes,
+  SUM(CASE WHEN runs_total = 0 THEN 1 ELSE 0 END)::INT                 AS dots,
+  SUM(CASE WHEN wicket_type IS NOT NULL
+            AND player_out_id = batter_id THEN 1 ELSE 0 END)::INT      AS batter_outs,
+  SUM(CASE WHEN {BOWLER_WICKET} THEN 1 ELSE 0 END)::INT                AS bowler_wkts,
+  SUM(CASE WHEN wicket_type IS NOT NULL
+            AND player_out_id IS NOT NULL THEN 1 ELSE 0 END)::INT      AS team_wkts
+FROM {{balls}}
+GROUP BY ALL
+"""
+
+# ---------------------------------------------------------------- cube ----
+# One row per match × innings × player.  A player either bats or bowls in a
+# given innings, so batting and bowling facts share the row shape and the
+# other side's columns are 0.  Column semantics match the /batting and
+# /bowling endpoints: bat_balls / bowl_balls count every delivery.
+CUBE_SQL = f"""
+SELECT * FROM (
+  SELECT {KEYS},
+    batter_id                      AS player_id,
+    SUM(balls)::INT                AS bat_balls,
+    SUM(bat_legal)::INT            AS bat_legal,
+    SUM(runs_batter)::INT          AS bat_runs,
+    SUM(fours)::INT                AS fours,
+    SUM(sixes)::INT                AS sixes,
+    SUM(batter_outs)::INT          AS outs,
+    0 AS bowl_balls, 0 AS bowl_legal, 0 AS runs_conceded, 0 AS wickets,
+    0 AS dots, 0 AS boundaries_conc
+  FROM {{spells}}
+  GROUP BY ALL
+
+  UNION ALL BY NAME
+
+  SELECT {KEYS},
+    bowler_id                      AS player_id,
+    0 AS bat_balls, 0 AS bat_legal, 0 AS bat_runs, 0 AS fours, 0 AS sixes, 0 AS outs,
+    SUM(balls)::INT                AS bowl_balls,
+    SUM(bowl_legal)::INT           AS bowl_legal,
+    SUM(runs_total)::INT           AS runs_conceded,
+    SUM(bowler_wkts)::INT          AS wickets,
+    SUM(dots)::INT                 AS dots,
+    SUM(fours + sixes)::INT        AS boundaries_conc
+  FROM {{spells}}
+  GROUP BY ALL
+)
+ORDER BY match_type, season_year, player_id
+"""
+
+# -------------------------------------------------------- team innings ----
+# One row per match × innings: whole-innings totals plus cumulative totals
+# for every PHASES window (runs_6 = first 6 overs, …).
+_WINDOWS = ",\n  ".join(
+    f"SUM(CASE WHEN phase <= {o} THEN {col} ELSE 0 END)::INT AS {name}_{o}"
+    for o in PHASES
+    for col, name in (("runs_total", "runs"), ("fours", "fours"),
+                      ("sixes", "sixes"), ("team_wkts", "wkts")))
+
+TEAM_INNINGS_SQL = f"""
+SELECT {KEYS},
+  SUM(runs_total)::INT AS runs_total,
+  SUM(fours)::INT      AS fours_total,
+  SUM(sixes)::INT      AS sixes_total,
+  SUM(team_wkts)::INT  AS wkts_total,
+  {_WINDOWS}
+FROM {{spells}}
+GROUP BY ALL
+"""
+
+# ------------------------------------------------------------ matchups ----
+# Sparse batter × bowler store: one row per pair that actually met, per
+# season × format × event × sides.  `dismissals` is the batter out on that
+# bowler's deliveries (any kind, as /matchup counts it), `bowler_wkts` the
+# ones credited to the bowler; `dots` are deliveries with no run at all.
+MATCHUP_SQL = """
+SELECT season, season_year, match_type, event_id, batting_team_id, bowling_team_id,
+  batter_id, bowler_id,
+  SUM(balls)::INT        AS balls,
+  SUM(bat_legal)::INT    AS legal,
+  SUM(runs_batter)::INT  AS runs,
+  SUM(batter_outs)::INT  AS dismissals,
+  SUM(bowler_wkts)::INT  AS bowler_wkts,
+  SUM(dots)::INT         AS dots,
+  SUM(fours)::INT        AS fours,
+  SUM(sixes)::INT        AS sixes
+FROM {spells}
+GROUP BY ALL
+ORDER BY match_type, season_year, batter_id, bowler_id
+"""
+
+# --------------------------------------------------------------- lists ----
+# Filter dropdowns: events per format, batting teams per format × event,
+# batters per team – each with its match count and last match date.
+LISTS_SQL = """
+SELECT
+  CASE GROUPING(match_type, event_id, team_id, player_id)
+       WHEN 3  THEN 'event'                  -- (match_type, event_id)
+       WHEN 1  THEN 'team'                   -- (match_type, event_id, team_id)
+       ELSE         'player' END             -- (team_id, player_id)
+                                AS level,
+  match_type, event_id, team_id, player_id,
+  COUNT(DISTINCT match_id)::INT AS matches,
+  MAX(match_date)               AS last_seen
+FROM (SELECT match_type, event_id, batting_team_id AS team_id, player_id,
+             match_id, match_date
+      FROM {cube} WHERE bat_balls > 0)
+GROUP BY GROUPING SETS ((match_type, event_id),
+                        (match_type, event_id, team_id),
+                        (team_id, player_id))
+"""
+
+# -------------------------------------------------------- prefix sums ----
+# Running totals per series through each season_year.  A "last N years"
+# window is the latest total minus the one before the cutoff year – two
+# values per series instead of a rescan of every fact row in the window.
+def prefix_sql(src: str, series: str, cols: Dict[str, str]) -> str:
+    """Yearly `cols` (name → aggregate over src) as cum_<name> per series × season_year."""
+    cums = ",\n  ".join(f"(SUM({agg}) OVER w)::INT AS cum_{name}" for name, agg in cols.items())
+    return f"""
+SELECT {series}, season_year,
+  {cums}
+FROM {src}
+GROUP BY {series}, season_year
+WINDOW w AS (PARTITION BY {series} ORDER BY season_year)
+"""
+
+def window_sql(src: str, series: str, cols: List[str], cutoff: Optional[int],
+               where: str = "TRUE") -> str:
+    """
+    One row per series of a prefix_sql() relation: each col summed over
+    season_year >= cutoff (all seasons when None).  Totals only grow, so
+    MAX is the latest one; series with nothing in the window are dropped.
+    """
+    if cutoff is None:
+        sel, having = [f"MAX(cum_{c}) AS {c}" for c in cols], "TRUE"
+    else:
+        sel = [f"MAX(cum_{c}) - COALESCE(MAX(cum_{c}) FILTER (WHERE season_year < {cutoff}), 0) AS {c}"
+               for c in cols]
+        having = f"MAX(season_year) >= {cutoff}"
+    return f"""
+SELECT {series}, {", ".join(sel)}
+FROM {src}
+WHERE {where}
+GROUP BY {series}
+HAVING {having}
+"""
+
+# Per player × own team (batting side when batting, fielding side when
+# bowling): /batting and /bowling without event / opposition / venue /
+# innings filters.  Innings counts are distinct matches, so they add up
+# across seasons and teams like everything else.
+PLAYER_SERIES = "match_type, team_id, player_id"
+PLAYER_YEAR_COLS = {
+    "bat_inns":      "COUNT(DISTINCT match_id) FILTER (WHERE bat_balls > 0)",
+    "bat_runs":      "SUM(bat_runs)",
+    "outs":          "SUM(outs)",
+    "bat_balls":     "SUM(bat_balls)",
+    "fours":         "SUM(fours)",
+    "sixes":         "SUM(sixes)",
+    "bowl_inns":     "COUNT(DISTINCT match_id) FILTER (WHERE bowl_balls > 0)",
+    "bowl_balls":    "SUM(bowl_balls)",
+    "runs_conceded": "SUM(runs_conceded)",
+    "wickets":       "SUM(wickets)",
+}
+PLAYER_YEARS_SQL = prefix_sql(
+    "(SELECT *, CASE WHEN bat_balls > 0 THEN batting_team_id ELSE bowling_team_id END"
+    " AS team_id FROM {cube})", PLAYER_SERIES, PLAYER_YEAR_COLS)
+
+# Per batter × bowler × sides, events folded in: /matchup, /matchup/bowler
+# without an event filter.
+MATCHUP_SERIES = "match_type, batting_team_id, bowling_team_id, batter_id, bowler_id"
+MATCHUP_YEAR_COLS = {c: f"SUM({c})" for c in
+                     ("balls", "legal", "runs", "dismissals", "dots", "fours", "sixes")}
+MATCHUP_YEARS_SQL = prefix_sql("{matchups}", MATCHUP_SERIES, MATCHUP_YEAR_COLS)
+
+def cube_sql(balls: str) -> str:
+    """CUBE_SQL straight from a deliveries relation (no materialised spells)."""
+    return CUBE_SQL.format(spells=f"({SPELL_SQL.format(balls=balls)})")
+
+def matchup_sql(balls: str) -> str:
+    """MATCHUP_SQL straight from a deliveries relation."""
+    return MATCHUP_SQL.format(spells=f"({SPELL_SQL.format(balls=balls)})")
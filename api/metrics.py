@@ -0,0 +1,55 @@
+##############################################################################
+# Cricket Stats • derived metrics
+#  One definition of every rate / ratio, rendered as DuckDB SQL so it is
+#  computed column-at-a-time inside the query – by the API endpoints and by
+#  scripts/build_summaries.py alike.
+#
+#  Every ratio divides by NULLIF(den, 0): a zero or missing denominator gives
+#  NULL, never ±inf / NaN (JSON null, Arrow null).
+##############################################################################
+from typing import Dict, Optional
+
+def ratio(num: str, den: str, scale: int = 1, digits: Optional[int] = None) -> str:
+    """scale × num / den as DOUBLE, NULL when den is 0; ROUNDed when digits is set."""
+    expr = f"{num} / NULLIF({den}, 0)" if scale == 1 else f"{scale} * {num} / NULLIF({den}, 0)"
+    return expr if digits is None else f"ROUND({expr}, {digits})"
+
+def average(runs: str, outs: str, digits: Optional[int] = None) -> str:
+    """Batting or bowling average – runs per dismissal."""
+    return ratio(runs, outs, 1, digits)
+
+def strike_rate(runs: str, balls: str, digits: Optional[int] = None) -> str:
+    """Batting strike rate – runs per 100 balls."""
+    return ratio(runs, balls, 100, digits)
+
+def balls_per(balls: str, events: str, digits: Optional[int] = None) -> str:
+    """Balls per event – bowling strike rate (per wicket), balls per four / six."""
+    return ratio(balls, events, 1, digits)
+
+def economy(runs: str, balls: str, digits: Optional[int] = None) -> str:
+    """Runs conceded per six-ball over."""
+    return ratio(runs, balls, 6, digits)
+
+def pct(part: str, whole: str, digits: Optional[int] = None) -> str:
+    return ratio(part, whole, 100, digits)
+
+def project(defs: Dict[str, str]) -> str:
+    """{name: expr} → `expr AS "name", …` for a SELECT list."""
+    return ",\n           ".join(f'{expr} AS "{name}"' for name, expr in defs.items())
+
+# ---------------------------------------------------------- endpoints ----
+# Over the per-player aggregates of /batting and /bowling.
+BATTING = {
+    "avg": average("runs", "outs", 2),
+    "sr":  strike_rate("runs", "balls", 2),
+    "bp4": balls_per("balls", "fours", 1),
+    "bp6": balls_per("balls", "sixes", 1),
+    "%4s": pct("fours", "balls", 2),
+    "%6s": pct("sixes", "balls", 2),
+}
+
+BOWLING = {
+    "econ": economy("runs", "balls", 2),
+    "sr":   balls_per("balls", "wkts", 1),
+    "avg":  average("runs", "wkts", 2),
+}
@@ -0,0 +1,294 @@
+"""
+bench_api.py
+────────────
+Latency / throughput benchmark for api/api.py over synthetic data.
+
+    python scripts/bench_api.py                       # 1× archive, compare with baseline
+    python scripts/bench_api.py --scale 1 10 100      # one run per size
+    python scripts/bench_api.py --save-baseline       # record this run as the baseline
+
+For every --scale:
+
+1. synth_data.py writes deliveries + dimensions and build_summaries.py the
+   summary Parquet under bench_data/x<scale>/ – kept between runs (same
+   scale / seed / generator version), rebuilt with --regen.
+2. A fresh interpreter points api.py at them (CRICKET_BALLS_DIR,
+   CRICKET_DIMS_DIR, CRICKET_PARQ_DIR), runs its startup and replays
+   --requests calls drawn from MIX, --concurrency at a time, straight
+   through the ASGI app – routing, validation, query pool, cache and JSON
+   rendering included, no sockets or HTTP client.
+3. p50 / p95 / p99 latency (overall and per endpoint), requests/s, startup
+   time and peak RSS are printed next to BASELINE; any metric more than
+   --tolerance worse than the baseline fails the run (exit status 1).
+
+The result cache is off (CRICKET_CACHE_MB=0) unless --cache is given, so
+every call pays for its query.
+"""
+
+from pathlib import Path
+from urllib.parse import urlencode
+import argparse, asyncio, json, os, random, resource, shutil, statistics, subprocess, sys, time
+
+HERE     = Path(__file__).resolve().parent
+ROOT     = HERE.parent
+BASELINE = HERE / "bench_baseline.json"
+DATA_DIR = ROOT / "bench_data"
+
+WARMUP = 50                # calls replayed before measuring
+
+# ── Request mix ──────────────────────────────────────────────────────────
+# endpoint → relative weight; parameters are drawn by Picker.params()
+MIX = {
+    "/lists/events":  10,
+    "/lists/teams":   10,
+    "/lists/players": 10,
+    "/batting":       25,
+    "/bowling":       20,
+    "/team":          10,
+    "/matchup":       15,
+}
+
+
+class Picker:
+    """Realistic parameters from what the API itself lists: events, teams, squads."""
+
+    def __init__(self, api, rng: random.Random):
+        self.rng   = rng
+        names      = {d: api.INDEX[d].name for d in ("events", "teams", "players")}
+        self.events = {fmt: [names["events"][e] for e in sorted(st)]
+                       for fmt, st in api.EVENTS_IN.items() if st}
+        self.teams = [(fmt, names["events"][ev], [names["teams"][t] for t in sorted(st)])
+                      for (fmt, ev), st in sorted(api.TEAMS_IN.items(), key=str)
+                      if ev is not None and len(st) > 1]
+        self.squad = {names["teams"][t]: [names["players"][p] for p in sorted(st)]
+                      for t, st in api.PLAYERS_IN.items() if st}
+        if not self.teams or not self.squad:
+            raise SystemExit("❌  The API lists no events / teams – is the data empty?")
+
+    def fixture(self) -> tuple[str, str, str, str]:
+        """(fmt, event, team, opponent) that actually met in that event."""
+        fmt, event, teams = self.rng.choice(self.teams)
+        team, opp = self.rng.sample(teams, 2)
+        return fmt, event, team, opp
+
+    def params(self, path: str) -> dict:
+        r = self.rng
+        fmt, event, team, opp = self.fixture()
+        last = r.choice([1, 3, 3, 5, 0])
+        if path == "/lists/events":
+            return {"fmt": fmt}
+        if path == "/lists/teams":
+            return {"fmt": fmt, "event": event}
+        if path == "/lists/players":
+            return {"team": team}
+        if path in ("/batting", "/bowling"):
+            p = {"fmt": fmt, "last": last}
+            if r.random() < 0.3: p["team"] = team
+            if r.random() < 0.2: p["event"] = event
+            return p
+        if path == "/team":
+            return {"fmt": fmt, "event": event, "team": team}
+        if path == "/matchup":
+            batter = r.choice(self.squad.get(team) or [team])
+            return {"fmt": fmt, "batter": batter, "opp": opp, "last": r.choice([3, 0])}
+        raise ValueError(path)
+
+    def plan(self, n: int) -> list[tuple[str, dict]]:
+        paths = self.rng.choices(list(MIX), weights=list(MIX.values()), k=n)
+        return [(p, self.params(p)) for p in paths]
+
+
+# ── In-process driver (child interpreter) ────────────────────────────────
+async def get(app, path: str, params: dict) -> int:
+    """One GET through the ASGI app; returns the status code (body discarded)."""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+             "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+             "query_string": urlencode(params).encode(), "root_path": "",
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0),
+             "server": ("bench", 80)}
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(msg):
+        nonlocal status
+        if msg["type"] == "http.response.start":
+            status = msg["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def drive(app, calls: list[tuple[str, dict]], concurrency: int):
+    """Replay `calls` with `concurrency` clients → ([(path, status, secs)], wall secs)."""
+    todo, out = iter(calls), []
+
+    async def client():
+        for path, params in todo:                     # shared iterator = work queue
+            t0 = time.perf_counter()
+            status = await get(app, path, params)
+            out.append((path, status, time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return out, time.perf_counter() - t0
+
+
+def percentiles(secs: list[float]) -> dict[str, float]:
+    ms = sorted(s * 1000 for s in secs)
+    if len(ms) < 2:
+        return {"p50": ms[0], "p95": ms[0], "p99": ms[0]}
+    q = statistics.quantiles(ms, n=100, method="inclusive")
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     # KiB on Linux, bytes on macOS
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def replay(args) -> dict:
+    """Child side: start the API on the environment's data and replay the mix."""
+    sys.path.insert(0, str(ROOT))
+    from api import api
+
+    t0 = time.perf_counter()
+    api._startup()
+    startup = time.perf_counter() - t0
+
+    calls = Picker(api, random.Random(args.seed)).plan(WARMUP + args.requests)
+    asyncio.run(drive(api.app, calls[:WARMUP], args.concurrency))
+    out, wall = asyncio.run(drive(api.app, calls[WARMUP:], args.concurrency))
+
+    statuses: dict[str, int] = {}
+    for _, status, _ in out:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(out), "rps": len(out) / wall, "startup_s": startup,
+        "peak_rss_mb": peak_rss_mb(), "statuses": statuses,
+        **percentiles([s for *_, s in out]),
+        "endpoints": {p: {"n": sum(1 for q, *_ in out if q == p),
+                          **percentiles([s for q, _, s in out if q == p])}
+                      for p in MIX if any(q == p for q, *_ in out)},
+    }
+
+
+# ── Parent: data, runs, report ───────────────────────────────────────────
+def prepare(scale: float, seed: int, regen: bool) -> Path:
+    """bench_data/x<scale>/ with deliveries, dims and summaries – reused when current."""
+    from synth_data import VERSION, generate
+
+    d, want = DATA_DIR / f"x{scale:g}", {"scale": scale, "seed": seed, "version": VERSION}
+    stamp = d / "_synth.json"
+    if not regen and stamp.exists() and json.loads(stamp.read_text()) == want:
+        return d
+    shutil.rmtree(d, ignore_errors=True)
+    t0   = time.perf_counter()
+    rows = generate(d / "balls_parted", d / "dims", scale, seed)
+    subprocess.run([sys.executable, str(HERE / "build_summaries.py"),
+                    "--parts-dir", str(d / "balls_parted"), "--out-dir", str(d / "parquet")],
+                   env={**os.environ, "CRICKET_DIMS_DIR": str(d / "dims")}, cwd=ROOT, check=True)
+    stamp.write_text(json.dumps(want))
+    print(f"✅  {rows:,} deliveries at {scale:g}× → {d}  [{time.perf_counter() - t0:.1f} s]")
+    return d
+
+
+def run_scale(scale: float, args) -> dict:
+    d   = prepare(scale, args.seed, args.regen)
+    out = d / "_result.json"
+    env = {**os.environ,
+           "CRICKET_BALLS_DIR": str(d / "balls_parted"), "CRICKET_DIMS_DIR": str(d / "dims"),
+           "CRICKET_PARQ_DIR":  str(d / "parquet"),      "CRICKET_DB": ":memory:",
+           "CRICKET_BALLS_MODE": args.balls_mode}
+    if not args.cache:
+        env["CRICKET_CACHE_MB"] = "0"
+    subprocess.run([sys.executable, __file__, "--replay", str(out),
+                    "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                    "--seed", str(args.seed)], env=env, cwd=ROOT, check=True)
+    return json.loads(out.read_text())
+
+
+def config(args) -> dict:
+    return {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed,
+            "cache": args.cache, "balls_mode": args.balls_mode}
+
+
+LOWER_IS_BETTER = ("p50", "p95", "p99", "startup_s", "peak_rss_mb")
+
+def delta(new: float, old: float | None, higher_is_better: bool, tol: float) -> tuple[str, bool]:
+    """'+12.3%' vs the baseline and whether it is a regression beyond tol."""
+    if not old:
+        return "", False
+    change = (new - old) / old
+    worse  = -change if higher_is_better else change
+    return f"{change:+.1%}", worse > tol
+
+
+def report(scale: float, res: dict, base: dict | None, tol: float) -> bool:
+    """Print one scale's numbers (vs baseline); True when something regressed."""
+    base, regressed = base or {}, False
+    print(f"\n── {scale:g}× archive ── {res['requests']:,} requests, statuses {res['statuses']}")
+    print(f"  {'':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row, old in [("all", res, base), *(
+            (p, r, base.get("endpoints", {}).get(p, {})) for p, r in res["endpoints"].items())]:
+        cells = []
+        for k in ("p50", "p95", "p99"):
+            d, bad = delta(row[k], old.get(k), False, tol)
+            regressed |= bad and name == "all"
+            cells.append(f"{row[k]:>10.2f}" + (f" {d:>7}{' ❌' if bad else ''}" if d else ""))
+        print(f"  {name:<16}" + "".join(cells))
+    for k, label, unit in (("rps", "throughput", "req/s"), ("startup_s", "startup", "s"),
+                           ("peak_rss_mb", "peak RSS", "MB")):
+        d, bad = delta(res[k], base.get(k), k not in LOWER_IS_BETTER, tol)
+        regressed |= bad
+        print(f"  {label:<16}{res[k]:>10.2f} {unit:<6}" + (f"{d:>7}{' ❌' if bad else ''}" if d else ""))
+    return regressed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark api.py on synthetic data")
+    ap.add_argument("--scale", type=float, nargs="+", default=[1.0],
+                    help="dataset sizes as multiples of the real archive (e.g. 1 10 100)")
+    ap.add_argument("--requests",    type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--seed",        type=int, default=0)
+    ap.add_argument("--balls-mode",  choices=("table", "parquet"), default="table")
+    ap.add_argument("--cache", action="store_true", help="keep the API's result cache on")
+    ap.add_argument("--regen", action="store_true", help="regenerate the synthetic data")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true",
+                    help="write this run's numbers to --baseline")
+    ap.add_argument("--tolerance", type=float, default=0.15,
+                    help="allowed slowdown vs the baseline (0.15 = 15%%)")
+    ap.add_argument("--replay", type=Path, help=argparse.SUPPRESS)     # child mode
+    args = ap.parse_args()
+
+    if args.replay:
+        args.replay.write_text(json.dumps(replay(args)))
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if baseline and baseline.get("config") != config(args):
+        print(f"ℹ️  Baseline was recorded with {baseline.get('config')} – numbers may not compare.")
+    elif not baseline:
+        print(f"ℹ️  No baseline at {args.baseline} yet – run with --save-baseline to record one.")
+
+    results, regressed = {}, False
+    for scale in args.scale:
+        results[f"{scale:g}"] = res = run_scale(scale, args)
+        regressed |= report(scale, res, baseline.get("scales", {}).get(f"{scale:g}"),
+                            args.tolerance)
+
+    if args.save_baseline:
+        scales = {**baseline.get("scales", {}), **results}
+        args.baseline.write_text(json.dumps({"config": config(args), "scales": scales},
+                                            indent=2, sort_keys=True))
+        print(f"\n✓ Baseline saved → {args.baseline}")
+    elif regressed:
+        print(f"\n❌  Slower than the baseline by more than {args.tolerance:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+bench_ingest.py
+───────────────
+Throughput benchmark + profiler for the JSON → Parquet ingest in
+build_master_table.py.
+
+    python scripts/bench_ingest.py                          # 2 000 synthetic matches
+    python scripts/bench_ingest.py --corpus data/           # any Cricsheet JSON directory
+    python scripts/bench_ingest.py --workers 8              # + end-to-end run on the pool
+    python scripts/bench_ingest.py --cprofile ingest.prof --tracemalloc ingest_alloc.txt
+
+• The corpus defaults to bench_data/json_<matches>/, written once by
+  synth_data.write_corpus() and reused (same files → comparable numbers).
+
+• Stage pass (in-process, CHUNK_FILES files at a time, like a worker task):
+      read     file bytes
+      decode   loads – orjson when installed, else json
+      flatten  flatten_match() into the Columns buffers
+      arrow    Columns.batch() – broadcast match fields, build the batch
+      encode   Dims.encode – names → int ids
+      write    ParquetWriter (ZSTD) into a temp dir
+  reporting seconds, share of the total and the Python allocations still
+  alive after each stage (sys.getallocatedblocks() delta – what it built).
+
+• --workers N > 1 also times the real path end to end: iter_batches() on a
+  process pool, encode + write in the parent, as `build_master_table.py` runs.
+
+• --cprofile / --tracemalloc repeat the stage pass under the profiler
+  (separately, so neither skews the timings above) and dump pstats / the
+  top allocation sites at the chunk's peak (buffers + batch alive).
+"""
+
+from pathlib import Path
+import argparse, cProfile, pstats, sys, tempfile, time, tracemalloc
+
+import pyarrow as pa, pyarrow.parquet as pq
+
+from build_master_table import (BALL_SCHEMA, CHUNK_FILES, Columns, Dims, flatten_match,
+                                iter_batches, loads)
+
+ROOT     = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "bench_data"
+STAGES   = ("read", "decode", "flatten", "arrow", "encode", "write")
+TOP_N    = 25              # rows in the cProfile / tracemalloc summaries
+
+
+def corpus(args) -> list[Path]:
+    """--corpus, or the synthetic one for --matches (written on first use)."""
+    if args.corpus:
+        return sorted(args.corpus.glob("*.json"))
+    d = DATA_DIR / f"json_{args.matches}"
+    files = sorted(d.glob("*.json"))
+    if len(files) != args.matches:
+        from synth_data import write_corpus
+        write_corpus(d, args.matches, args.seed)
+        files = sorted(d.glob("*.json"))
+    return files
+
+
+# ── Stage pass ───────────────────────────────────────────────────────────
+class Clock:
+    """Seconds and live-allocation deltas per stage, summed over chunks."""
+
+    def __init__(self):
+        self.secs   = dict.fromkeys(STAGES, 0.0)
+        self.blocks = dict.fromkeys(STAGES, 0)
+        self.on_peak = None                        # called once buffers + batch are alive
+
+    def run(self, stage: str, fn, *args):
+        b0, t0 = sys.getallocatedblocks(), time.perf_counter()
+        out = fn(*args)
+        self.secs[stage]   += time.perf_counter() - t0
+        self.blocks[stage] += sys.getallocatedblocks() - b0
+        return out
+
+
+def stage_pass(files: list[Path], chunk: int, clock: Clock) -> int:
+    """Ingest `files` in-process through every stage; returns deliveries written."""
+    n_rows = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        dims   = Dims(Path(tmp) / "dims")
+        writer = pq.ParquetWriter(Path(tmp) / "balls.parquet", BALL_SCHEMA, compression="zstd")
+        try:
+            for i in range(0, len(files), chunk):
+                part  = files[i:i + chunk]
+                raw   = clock.run("read",   lambda: [fp.read_bytes() for fp in part])
+                docs  = clock.run("decode", lambda: [loads(b) for b in raw])
+                cols  = Columns()
+                clock.run("flatten", lambda: [flatten_match(m, fp.stem, cols)
+                                              for fp, m in zip(part, docs)])
+                batch = clock.run("arrow",  cols.batch)
+                if clock.on_peak:
+                    clock.on_peak(); clock.on_peak = None
+                tbl   = clock.run("encode", lambda: dims.encode(
+                                  pa.Table.from_batches([batch])).cast(BALL_SCHEMA))
+                clock.run("write", writer.write_table, tbl)
+                n_rows += tbl.num_rows
+                del raw, docs, cols, batch, tbl
+        finally:
+            writer.close()
+    return n_rows
+
+
+def end_to_end(files: list[Path], workers: int, chunk: int) -> tuple[float, int]:
+    """build_master_table.py's full path: pool parse → encode → write.  (secs, rows)"""
+    t0, n_rows = time.perf_counter(), 0
+    with tempfile.TemporaryDirectory() as tmp:
+        dims   = Dims(Path(tmp) / "dims")
+        writer = pq.ParquetWriter(Path(tmp) / "balls.parquet", BALL_SCHEMA, compression="zstd")
+        try:
+            for batch, _, _ in iter_batches(files, workers, chunk):
+                if batch.num_rows:
+                    writer.write_table(dims.encode(pa.Table.from_batches([batch])).cast(BALL_SCHEMA))
+                    n_rows += batch.num_rows
+        finally:
+            writer.close()
+    return time.perf_counter() - t0, n_rows
+
+
+# ── Profilers ────────────────────────────────────────────────────────────
+def profile(files: list[Path], chunk: int, out: Path) -> None:
+    prof = cProfile.Profile()
+    prof.runcall(stage_pass, files, chunk, Clock())
+    prof.dump_stats(out)
+    print(f"\n── cProfile (top {TOP_N} by cumulative time) → {out}")
+    pstats.Stats(prof).sort_stats("cumulative").print_stats(TOP_N)
+
+
+def trace_allocations(files: list[Path], chunk: int, out: Path) -> None:
+    clock, snap = Clock(), []
+    clock.on_peak = lambda: snap.append(tracemalloc.take_snapshot())
+    tracemalloc.start(10)
+    try:
+        stage_pass(files, chunk, clock)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = snap[0].statistics("lineno") if snap else []
+    with out.open("w") as fh:
+        fh.write(f"peak traced memory: {peak / 2**20:.1f} MB\n"
+                 f"top {TOP_N} allocation sites at the first chunk's peak:\n")
+        for st in stats[:TOP_N]:
+            fh.write(f"{st.size / 2**20:9.2f} MB {st.count:>10,} blocks  {st.traceback}\n")
+    print(f"\n── tracemalloc → {out}  (peak {peak / 2**20:.1f} MB)")
+    for st in stats[:10]:
+        print(f"  {st.size / 2**20:8.2f} MB {st.count:>10,} blocks  {st.traceback}")
+
+
+# ── Main ─────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark the JSON → Parquet ingest")
+    ap.add_argument("--corpus",  type=Path, help="directory of Cricsheet JSON (default: synthetic)")
+    ap.add_argument("--matches", type=int,  default=2000, help="synthetic corpus size")
+    ap.add_argument("--seed",    type=int,  default=0)
+    ap.add_argument("--chunk",   type=int,  default=CHUNK_FILES, help="match files per task")
+    ap.add_argument("--workers", type=int,  default=1,
+                    help="> 1: also time the end-to-end run on a process pool")
+    ap.add_argument("--cprofile",    type=Path, help="dump cProfile stats here")
+    ap.add_argument("--tracemalloc", type=Path, help="dump top allocation sites here")
+    args = ap.parse_args()
+
+    files = corpus(args)
+    if not files:
+        print("❌  No *.json files in the corpus.")
+        return
+    size = sum(fp.stat().st_size for fp in files)
+    print(f"ℹ️  {len(files):,} match files, {size / 2**20:.1f} MB, chunk {args.chunk}")
+
+    clock  = Clock()
+    n_rows = stage_pass(files, args.chunk, clock)
+    total  = sum(clock.secs.values())
+    print(f"\n  {'stage':<10}{'secs':>9}{'share':>8}{'live allocs':>14}")
+    for st in STAGES:
+        print(f"  {st:<10}{clock.secs[st]:>9.2f}{clock.secs[st] / total:>8.1%}"
+              f"{clock.blocks[st]:>14,}")
+    print(f"  {'total':<10}{total:>9.2f}")
+    print(f"✓ in-process : {len(files) / total:>10,.1f} files/s  {n_rows / total:>12,.0f} deliveries/s")
+
+    if args.workers > 1:
+        secs, rows = end_to_end(files, args.workers, args.chunk)
+        print(f"✓ {args.workers} workers  : {len(files) / secs:>10,.1f} files/s  "
+              f"{rows / secs:>12,.0f} deliveries/s")
+
+    if args.cprofile:
+        profile(files, args.chunk, args.cprofile)
+    if args.tracemalloc:
+        trace_allocations(files, args.chunk, args.tracemalloc)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,33 +9,214 @@ Parquet file (one row per delivery) **without crashing on odd schemas**.
   layouts automatically.
 
 • Skips & logs innings that have *neither* key so you can inspect them later.
+
+• Decodes with orjson when it is installed (stdlib json otherwise) and
+  flattens columnar: match / innings fields are kept once and broadcast
+  when the batch is built, deliveries go straight into typed column
+  buffers – no per-delivery dict.
+
+• Parses on a process pool (`--workers N`, default = all cores).  Each worker
+  turns a slice of match files into one Arrow record batch; the parent streams
+  those batches straight into the Parquet writer, so memory stays flat no
+  matter how big the archive gets.  `--workers 1` runs everything in-process.
+
+• `--incremental` keeps a manifest of ingested match_ids (sha1 + mtime + size)
+  next to the hive-partitioned `balls_parted/` layout, parses only new or
+  changed files and rewrites just the `season=/match_type=` partitions they
+  touch.  The first incremental run (no manifest yet) re-ingests everything.
+
+• Player / team / venue / event names are stored as int32 ids (see
+  api/dims.py).  The parent process owns the append-only name → id maps and
+  writes them to DIMS_DIR as <dimension>.parquet; partitions still in the
+  older string layout are re-encoded the next time --incremental runs.
 """
 
+from array import array
 from pathlib import Path
-import json, polars as pl
+import argparse, hashlib, json, os, sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from collections import defaultdict
+from itertools import islice
+from urllib.parse import quote, unquote
+import pyarrow as pa, pyarrow.compute as pc, pyarrow.parquet as pq
 from tqdm import tqdm
 
+try:
+    from orjson import loads                       # ~3-5× faster than json on match files
+except ImportError:
+    from json import loads
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))       # repo root
+from api.dims import DIMENSIONS, DIMS_DIR as DIMS_DEFAULT, ID_COLS, dim_path
+
 # ── Paths ────────────────────────────────────────────────────────────────
 DATA_DIR        = Path("/Users/arpitbhutani/Desktop/cricket/data")          # ↩ adjust if needed
 OUT_PARQUET     = Path("/Users/arpitbhutani/Desktop/cricket/cricket_balls.parquet")
 BAD_LOG_FILE    = Path("/Users/arpitbhutani/Desktop/cricket/missing_overs.log")
+PARTS_DIR       = Path("/Users/arpitbhutani/Desktop/cricket/balls_parted")  # hive layout
+MANIFEST_NAME   = "_manifest.json"                                          # lives in PARTS_DIR
+DIMS_DIR        = Path(DIMS_DEFAULT)        # <dimension>.parquet – $CRICKET_DIMS_DIR, as api/dims.py
 
 # ── Config ───────────────────────────────────────────────────────────────
 BALLS_PER_OVER  = 6        # safest default – tweak if you ingest 8-ball comps
+CHUNK_FILES     = 64       # match files per worker task (≈ one row group)
+ROW_GROUP_ROWS  = 122_880  # partition files: rows per row group (DuckDB default)
+FILE_ROWS       = 4_000_000  # partition files: rows per data_N.parquet
+
+# One parsed row per delivery – fixed up-front so every worker emits identical batches
+SCHEMA = pa.schema([
+    # Match meta
+    ("match_id",             pa.string()),
+    ("match_date",           pa.date32()),
+    ("event_name",           pa.string()),
+    ("season",               pa.string()),
+    ("match_type",           pa.string()),
+    ("venue",                pa.string()),
+    ("city",                 pa.string()),
+    # Innings context
+    ("innings_number",       pa.int64()),
+    ("batting_team",         pa.string()),
+    ("bowling_team",         pa.string()),
+    # Ball position
+    ("over",                 pa.int64()),
+    ("ball_in_over",         pa.int64()),
+    ("ball_number_absolute", pa.int64()),
+    # Players
+    ("batter",               pa.string()),
+    ("bowler",               pa.string()),
+    ("non_striker",          pa.string()),
+    # Runs / extras
+    ("runs_batter",          pa.int64()),
+    ("runs_extras",          pa.int64()),
+    ("runs_total",           pa.int64()),
+    ("extras_type",          pa.string()),
+    # Boundaries & flags
+    ("is_boundary_4",        pa.bool_()),
+    ("is_boundary_6",        pa.bool_()),
+    # Wicket
+    ("wicket_type",          pa.string()),
+    ("player_out",           pa.string()),
+    ("fielders_involved",    pa.string()),
+])
+
+# What gets stored: every name column in ID_COLS replaced by its int32 id
+BALL_SCHEMA = pa.schema([pa.field(ID_COLS[f.name][0], pa.int32()) if f.name in ID_COLS else f
+                         for f in SCHEMA])
+
+# Partition files don't repeat the hive keys – they live in the directory names
+PART_KEYS   = ("season", "match_type")
+NULL_PART   = "__HIVE_DEFAULT_PARTITION__"   # directory for a missing key; DuckDB reads it as NULL
+PART_SCHEMA = pa.schema([f for f in BALL_SCHEMA if f.name not in PART_KEYS])
+SORT_KEYS   = [("match_id", "ascending"), ("innings_number", "ascending"),
+               ("ball_number_absolute", "ascending")]
+# Low-cardinality strings that repeat on every ball → dictionary pages
+DICT_COLS   = ["match_id", "city", "extras_type", "wicket_type"]
+
+
+# ── Dimensions ───────────────────────────────────────────────────────────
+class Dims:
+    """Append-only name → id maps; id = position in `names[dim]`."""
+
+    def __init__(self, dims_dir: Path):
+        self.dir   = dims_dir
+        self.names = {}
+        self._sets = {}                               # cached Arrow value sets
+        for dim in DIMENSIONS:
+            fp = Path(dim_path(dim, str(dims_dir)))
+            self.names[dim] = (pq.read_table(fp).sort_by("id")["name"].to_pylist()
+                               if fp.exists() else [])
+
+    def _value_set(self, dim: str) -> pa.Array:
+        if dim not in self._sets:
+            self._sets[dim] = pa.array(self.names[dim], pa.string())
+        return self._sets[dim]
+
+    def encode(self, tbl: pa.Table) -> pa.Table:
+        """Swap every name column in ID_COLS for its int32 id, minting ids for new names."""
+        for col, (id_col, dim) in ID_COLS.items():
+            if col not in tbl.column_names:
+                continue
+            vals = tbl[col]
+            new  = pc.unique(vals.filter(pc.invert(
+                pc.is_in(vals, value_set=self._value_set(dim))))).drop_null()
+            if len(new):
+                self.names[dim].extend(sorted(new.to_pylist()))
+                self._sets.pop(dim)
+            ids = pc.index_in(vals, value_set=self._value_set(dim)).cast(pa.int32())
+            tbl = tbl.set_column(tbl.column_names.index(col), id_col, ids)
+        return tbl
+
+    def save(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for dim, names in self.names.items():
+            fp  = Path(dim_path(dim, str(self.dir)))
+            tmp = fp.with_suffix(".tmp")
+            pq.write_table(pa.table({"id":   pa.array(range(len(names)), pa.int32()),
+                                     "name": pa.array(names, pa.string())}), tmp)
+            tmp.replace(fp)
+
+
+# ── Parsing ──────────────────────────────────────────────────────────────
+# Columnar flattening: match- and innings-level fields are stored once and
+# broadcast (Arrow `take`) when the batch is built; per-delivery values go
+# straight into typed buffers – no dict per delivery.
+def int_array(buf: array, typ: pa.DataType = pa.int64()) -> pa.Array:
+    """Zero-copy Arrow view of an array('q') / array('i') buffer (no nulls)."""
+    return pa.Array.from_buffers(typ, len(buf), [None, pa.py_buffer(buf)])
+
 
-rows          = []
-bad_files     = defaultdict(list)   # filename  ->  [innings numbers]
+class Columns:
+    """Column buffers for one chunk of matches → one RecordBatch in SCHEMA."""
 
-for fp in tqdm(list(DATA_DIR.glob("*.json")), desc="Parsing matches"):
-    with fp.open() as f:
-        match = json.load(f)
+    MATCH   = ("match_id", "match_date", "event_name", "season", "match_type", "venue", "city")
+    INNINGS = ("batting_team", "bowling_team")
+    INTS    = ("over", "ball_in_over", "ball_number_absolute",
+               "runs_batter", "runs_extras", "runs_total")
+    STRS    = ("batter", "bowler", "non_striker", "extras_type",
+               "wicket_type", "player_out", "fielders_involved")
 
+    def __init__(self):
+        self.match    = {c: [] for c in self.MATCH}
+        self.innings  = {c: [] for c in self.INNINGS}
+        self.inn_no   = array("q")                     # innings_number
+        self.inn_of   = array("i")                     # innings → match row
+        self.ball_of  = array("i")                     # delivery → innings row
+        self.ints     = {c: array("q") for c in self.INTS}
+        self.strs     = {c: [] for c in self.STRS}
+
+    def batch(self) -> pa.RecordBatch:
+        """Build the chunk's batch (once – the int buffers are exported zero-copy)."""
+        inn_idx   = int_array(self.ball_of, pa.int32())
+        match_idx = int_array(self.inn_of, pa.int32()).take(inn_idx)
+        cols = {c: pa.array(v, SCHEMA.field(c).type).take(match_idx) for c, v in self.match.items()}
+        cols.update({c: pa.array(v, pa.string()).take(inn_idx) for c, v in self.innings.items()})
+        cols["innings_number"] = int_array(self.inn_no).take(inn_idx)
+        cols.update({c: int_array(v) for c, v in self.ints.items()})
+        cols.update({c: pa.array(v, pa.string()) for c, v in self.strs.items()})
+        cols["is_boundary_4"] = pc.equal(cols["runs_batter"], 4)
+        cols["is_boundary_6"] = pc.equal(cols["runs_batter"], 6)
+        return pa.RecordBatch.from_arrays([cols[f.name] for f in SCHEMA], schema=SCHEMA)
+
+
+def flatten_match(match: dict, match_id: str, cols: Columns) -> list[int]:
+    """Append one decoded match to `cols`; returns the innings numbers we skipped."""
     info      = match["info"]
-    match_id  = fp.stem
     match_dt  = datetime.fromisoformat(info["dates"][0]).date()
+    season    = info.get("season")
+    season    = None if season is None else str(season)   # a few files use ints
+
+    m = len(cols.match["match_id"])
+    for c, v in zip(Columns.MATCH, (match_id, match_dt, info.get("event", {}).get("name"),
+                                    season, info["match_type"], info["venue"], info.get("city"))):
+        cols.match[c].append(v)
+
+    # Hot loop: bound appends, one per column per delivery
+    over_a, bio_a, abs_a, rb_a, re_a, rt_a = (cols.ints[c].append for c in Columns.INTS)
+    bat_a, bowl_a, ns_a, ext_a, wk_a, out_a, fld_a = (cols.strs[c].append for c in Columns.STRS)
+    ball_of_a = cols.ball_of.append
 
+    skipped = []
     for inn_no, inn in enumerate(match["innings"], start=1):
         # 1️⃣  Locate the list of deliveries ------------------------------
         if "overs" in inn:                                    # modern schema
@@ -43,11 +224,15 @@ for fp in tqdm(list(DATA_DIR.glob("*.json")), desc="Parsing matches"):
         elif "deliveries" in inn:                             # flat schema
             over_blocks = [{"over": None, "deliveries": inn["deliveries"]}]
         else:                                                 # totally unknown
-            bad_files[fp.name].append(inn_no)
+            skipped.append(inn_no)
             continue
 
         batting = inn["team"]
-        bowling = next(t for t in info["teams"] if t != batting)
+        i = len(cols.inn_no)
+        cols.inn_no.append(inn_no)
+        cols.inn_of.append(m)
+        cols.innings["batting_team"].append(batting)
+        cols.innings["bowling_team"].append(next(t for t in info["teams"] if t != batting))
         ball_counter = 0                                      # absolute within innings
 
         for ov in over_blocks:
@@ -57,83 +242,311 @@ for fp in tqdm(list(DATA_DIR.glob("*.json")), desc="Parsing matches"):
 
                 # Derive over / ball-in-over robustly
                 if raw_over_no is None:                       # flat schema
-                    over_no = (ball_counter - 1) // BALLS_PER_OVER
-                    ball_in_over = (ball_counter - 1) % BALLS_PER_OVER + 1
+                    over_a((ball_counter - 1) // BALLS_PER_OVER)
+                    bio_a((ball_counter - 1) % BALLS_PER_OVER + 1)
                 else:
-                    over_no = raw_over_no
-                    ball_in_over = idx_in_block
-
-                # ---- Build the row dict --------------------------------
-                d = {
-                    # Match meta -------------------------------------------------
-                    "match_id":        match_id,
-                    "match_date":      match_dt,
-                    "event_name":      info.get("event", {}).get("name"),
-                    "season":          info.get("season"),
-                    "match_type":      info["match_type"],
-                    "venue":           info["venue"],
-                    "city":            info.get("city"),
-
-                    # Innings context -------------------------------------------
-                    "innings_number":  inn_no,
-                    "batting_team":    batting,
-                    "bowling_team":    bowling,
-
-                    # Ball position ---------------------------------------------
-                    "over":            over_no,
-                    "ball_in_over":    ball_in_over,
-                    "ball_number_absolute": ball_counter,
-
-                    # Players ----------------------------------------------------
-                    "batter":          ball["batter"],
-                    "bowler":          ball["bowler"],
-                    "non_striker":     ball["non_striker"],
-
-                    # Runs / extras ---------------------------------------------
-                    "runs_batter":     ball["runs"]["batter"],
-                    "runs_extras":     ball["runs"]["extras"],
-                    "runs_total":      ball["runs"]["total"],
-                    "extras_type":     next(iter(ball.get("extras", {})), None),
-
-                    # Boundaries & flags ----------------------------------------
-                    "is_boundary_4":   ball["runs"]["batter"] == 4,
-                    "is_boundary_6":   ball["runs"]["batter"] == 6,
-
-                    # Wicket defaults -------------------------------------------
-                    "wicket_type":     None,
-                    "player_out":      None,
-                    "fielders_involved": None,
-                }
+                    over_a(raw_over_no)
+                    bio_a(idx_in_block)
+                abs_a(ball_counter)
+                ball_of_a(i)
+
+                runs = ball["runs"]
+                rb_a(runs["batter"]); re_a(runs["extras"]); rt_a(runs["total"])
+                bat_a(ball["batter"]); bowl_a(ball["bowler"]); ns_a(ball["non_striker"])
+                ext_a(next(iter(ball.get("extras", {})), None))
 
                 # Optional wicket block -----------------------------------------
                 if "wickets" in ball and ball["wickets"]:
-                    w  = ball["wickets"][0]
-                    d["wicket_type"] = w["kind"]
-                    d["player_out"]  = w["player_out"]
-
-                    fld_raw = w.get("fielders", [])
+                    w = ball["wickets"][0]
+                    wk_a(w["kind"])
+                    out_a(w["player_out"])
                     fld_norm = [
                         f["name"] if isinstance(f, dict) and "name" in f else str(f)
-                        for f in fld_raw
+                        for f in w.get("fielders", [])
                     ]
-                    d["fielders_involved"] = ", ".join(fld_norm) or None
-
-                rows.append(d)
-
-# ── Persist the main table ───────────────────────────────────────────────
-if rows:
-    pl.DataFrame(rows).write_parquet(OUT_PARQUET)
-    print(f"✅  Saved {OUT_PARQUET}  ({len(rows):,} rows)")
-else:
-    print("❌  No rows parsed – nothing written.")
-
-# ── Report any innings we skipped ────────────────────────────────────────
-if bad_files:
-    with BAD_LOG_FILE.open("w") as log:
-        for fname, inns in bad_files.items():
-            log.write(f"{fname}\tmissing deliveries in innings {inns}\n")
-
-    print(f"⚠️   {len(bad_files)} file(s) had no 'overs' or 'deliveries' key.")
-    print(f"    Logged details to {BAD_LOG_FILE}")
-else:
-    print("🎉  All files conformed – no structural issues recorded.")
+                    fld_a(", ".join(fld_norm) or None)
+                else:
+                    wk_a(None); out_a(None); fld_a(None)
+
+    return skipped
+
+
+def parse_chunk(files: list[Path]) -> tuple[pa.RecordBatch, dict[str, list[int]], int]:
+    """Worker task: a slice of match files → (record batch, skipped innings, n files)."""
+    cols, bad = Columns(), {}
+    for fp in files:
+        skipped = flatten_match(loads(fp.read_bytes()), fp.stem, cols)
+        if skipped:
+            bad[fp.name] = skipped
+    return cols.batch(), bad, len(files)
+
+
+def iter_batches(files: list[Path], workers: int, chunk: int):
+    """
+    Yield parse_chunk() results in file order.  With a pool, at most
+    2 × workers chunks are in flight so finished batches never pile up.
+    """
+    chunks = [files[i:i + chunk] for i in range(0, len(files), chunk)]
+    if workers <= 1:
+        yield from map(parse_chunk, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        todo    = iter(chunks)
+        pending = deque(pool.submit(parse_chunk, c) for c in islice(todo, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(parse_chunk, nxt))
+            yield result
+
+
+# ── Incremental ingest ───────────────────────────────────────────────────
+def load_manifest(parts_dir: Path) -> dict[str, dict]:
+    """match_id → {file, sha1, mtime, size, season, match_type}."""
+    fp = parts_dir / MANIFEST_NAME
+    if not fp.exists():
+        return {}
+    return json.loads(fp.read_text())["matches"]
+
+
+def save_manifest(parts_dir: Path, matches: dict[str, dict]) -> None:
+    fp  = parts_dir / MANIFEST_NAME
+    tmp = fp.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": 1, "matches": matches}, sort_keys=True))
+    tmp.replace(fp)
+
+
+def scan_changes(files: list[Path], manifest: dict[str, dict]) -> tuple[list[Path], dict[str, dict]]:
+    """
+    Split `files` into the ones that need parsing and fresh manifest stats.
+    mtime + size short-circuit the check; the sha1 only runs when they moved,
+    so a `touch`ed but identical file is not re-parsed.
+    """
+    todo, stats = [], {}
+    for fp in files:
+        st  = fp.stat()
+        old = manifest.get(fp.stem)
+        new = {"file": fp.name, "mtime": st.st_mtime, "size": st.st_size}
+        if old and old["mtime"] == new["mtime"] and old["size"] == new["size"]:
+            stats[fp.stem] = old
+            continue
+        new["sha1"] = hashlib.sha1(fp.read_bytes()).hexdigest()
+        if old and old["sha1"] == new["sha1"]:
+            stats[fp.stem] = {**old, **new}
+            continue
+        todo.append(fp)
+        stats[fp.stem] = new
+    return todo, stats
+
+
+def part_value(v) -> str:
+    """Hive directory value: escaped like DuckDB does, None → NULL_PART."""
+    return NULL_PART if v is None else quote(str(v), safe='')
+
+
+def partition_dir(parts_dir: Path, season: str, match_type: str) -> Path:
+    """`season=2013%2F14/match_type=Test` – same escaping DuckDB uses."""
+    return parts_dir / f"season={part_value(season)}" / f"match_type={part_value(match_type)}"
+
+
+def partition_key(part: Path) -> tuple[str, str]:
+    return tuple(unquote(d.name.split("=", 1)[1]) for d in (part.parent, part))
+
+
+def is_legacy(part: Path) -> bool:
+    """Partition still written with name strings instead of *_id columns?"""
+    files = sorted(part.glob("*.parquet"))
+    return bool(files) and "batter_id" not in pq.read_schema(files[0]).names
+
+
+def read_partition(part: Path, dims: Dims | None = None) -> pa.Table:
+    """All rows of one partition in PART_SCHEMA (string-layout files need `dims`)."""
+    tables = []
+    for fp in sorted(part.glob("*.parquet")):
+        tbl = pq.read_table(fp)
+        if "batter_id" not in tbl.column_names:
+            if dims is None:
+                raise ValueError(f"{fp} uses the string layout – pass Dims to re-encode it")
+            tbl = dims.encode(tbl)
+        tables.append(tbl.select(PART_SCHEMA.names).cast(PART_SCHEMA))
+    return pa.concat_tables(tables) if tables else PART_SCHEMA.empty_table()
+
+
+def write_partition(part: Path, table: pa.Table, file_rows: int = FILE_ROWS,
+                    row_group: int = ROW_GROUP_ROWS) -> list[Path]:
+    """
+    Replace every file in one hive partition with `table`: sorted on
+    SORT_KEYS, split into data_N.parquet files of ≤ file_rows rows, ZSTD +
+    dictionary-encoded names, fixed-size row groups with min/max statistics.
+    """
+    old, new = sorted(part.glob("*.parquet")), []
+    if table.num_rows:
+        part.mkdir(parents=True, exist_ok=True)
+        table = table.sort_by(SORT_KEYS)
+        for i, off in enumerate(range(0, table.num_rows, file_rows)):
+            tmp = part / f"data_{i}.parquet.tmp"
+            pq.write_table(table.slice(off, file_rows), tmp, compression="zstd",
+                           row_group_size=row_group, write_statistics=True,
+                           use_dictionary=[c for c in DICT_COLS if c in table.column_names])
+            new.append(tmp.with_suffix(""))
+        for fp in new:                                # swap in only once all are written
+            fp.with_suffix(".parquet.tmp").replace(fp)
+    for fp in old:
+        if fp not in new:
+            fp.unlink()
+    for d in (part, part.parent):                     # drop now-empty dirs
+        if d.exists() and not any(d.iterdir()):
+            d.rmdir()
+    return new
+
+
+def split_by_partition(tbl: pa.Table):
+    """
+    Yield ((season, match_type), match_ids, partition-schema slice) per
+    partition.  A match without a season / match type goes to the NULL_PART
+    partition instead of being dropped (pc.equal on null never matches).
+    """
+    keys = tbl.group_by(list(PART_KEYS)).aggregate([("match_id", "distinct")])
+    is_ = lambda col, v: pc.is_null(tbl[col]) if v is None else pc.equal(tbl[col], v)
+    for season, mtype, ids in zip(*(keys[c].to_pylist() for c in
+                                    ("season", "match_type", "match_id_distinct"))):
+        mask = pc.and_(is_("season", season), is_("match_type", mtype))
+        key  = tuple(NULL_PART if v is None else v for v in (season, mtype))
+        yield key, ids, tbl.filter(mask).select(PART_SCHEMA.names)
+
+
+def run_incremental(files: list[Path], parts_dir: Path, dims: Dims, workers: int,
+                    chunk: int, prune: bool) -> dict[str, list[int]]:
+    manifest     = load_manifest(parts_dir)
+    todo, stats  = scan_changes(files, manifest)
+    legacy       = {partition_key(d) for d in parts_dir.glob("season=*/match_type=*")
+                    if is_legacy(d)}
+    removed      = set(manifest) - set(stats) if prune else set()
+    if not prune:                                     # keep entries for vanished files
+        stats = {**{k: v for k, v in manifest.items() if k not in stats}, **stats}
+    for mid in removed:
+        stats.pop(mid, None)
+
+    if not todo and not removed and not legacy:
+        save_manifest(parts_dir, stats)
+        print("✅  Nothing new – partitions already up to date.")
+        return {}
+
+    # 1️⃣  Parse new / changed files into per-partition staging files ------
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    staging   = parts_dir.with_name(parts_dir.name + ".staging")  # outside the hive glob
+    staging.mkdir(exist_ok=True)
+    writers: dict[tuple, pq.ParquetWriter] = {}
+    bad_files = {}
+    try:
+        with tqdm(total=len(todo), desc="Parsing new matches") as bar:
+            for batch, bad, n_files in iter_batches(todo, workers, chunk):
+                bad_files.update(bad)
+                bar.update(n_files)
+                tbl = dims.encode(pa.Table.from_batches([batch]))
+                for key, ids, part in split_by_partition(tbl):
+                    if key not in writers:
+                        writers[key] = pq.ParquetWriter(staging / f"{len(writers)}.parquet",
+                                                        PART_SCHEMA)
+                    writers[key].write_table(part)
+                    for mid in ids:
+                        stats[mid].update(season=key[0], match_type=key[1])
+    finally:
+        for wr in writers.values():
+            wr.close()
+
+    # 2️⃣  Rewrite only the partitions that gained, changed or lost matches -
+    replaced = {fp.stem for fp in todo} | removed
+    touched  = set(writers) | legacy | {
+        (manifest[mid]["season"], manifest[mid]["match_type"])
+        for mid in replaced if mid in manifest and "season" in manifest[mid]
+    }
+    staged = {key: staging / f"{i}.parquet" for i, key in enumerate(writers)}
+    for key in tqdm(sorted(touched), desc="Rewriting partitions"):
+        part = partition_dir(parts_dir, *key)
+        old  = read_partition(part, dims)
+        keep = old.filter(pc.invert(pc.is_in(old["match_id"], value_set=pa.array(sorted(replaced)))))
+        new  = [pq.read_table(staged[key])] if key in staged else []
+        write_partition(part, pa.concat_tables([keep, *new]))
+
+    for fp in staging.iterdir():
+        fp.unlink()
+    staging.rmdir()
+    dims.save()
+    save_manifest(parts_dir, stats)
+    print(f"✅  {len(todo):,} new/changed and {len(removed):,} removed match(es) "
+          f"→ rewrote {len(touched)} partition(s) under {parts_dir}"
+          + (f" ({len(legacy)} re-encoded to ids)" if legacy else ""))
+    return bad_files
+
+
+def report_bad(bad_files: dict[str, list[int]]) -> None:
+    if bad_files:
+        with BAD_LOG_FILE.open("w") as log:
+            for fname, inns in bad_files.items():
+                log.write(f"{fname}\tmissing deliveries in innings {inns}\n")
+
+        print(f"⚠️   {len(bad_files)} file(s) had no 'overs' or 'deliveries' key.")
+        print(f"    Logged details to {BAD_LOG_FILE}")
+    else:
+        print("🎉  All files conformed – no structural issues recorded.")
+
+
+# ── Main ─────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Cricsheet JSON → ball-by-ball Parquet")
+    ap.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    ap.add_argument("--out",      type=Path, default=OUT_PARQUET)
+    ap.add_argument("--workers",  type=int,  default=os.cpu_count() or 1,
+                    help="parser processes (1 = parse in-process)")
+    ap.add_argument("--chunk",    type=int,  default=CHUNK_FILES,
+                    help="match files per worker task")
+    ap.add_argument("--incremental", action="store_true",
+                    help="update the hive partitions in --parts-dir instead of --out")
+    ap.add_argument("--parts-dir", type=Path, default=PARTS_DIR)
+    ap.add_argument("--dims-dir",  type=Path, default=DIMS_DIR)
+    ap.add_argument("--prune", action="store_true",
+                    help="with --incremental: drop matches whose JSON has disappeared")
+    args = ap.parse_args()
+
+    files     = sorted(args.data_dir.glob("*.json"))
+    dims      = Dims(args.dims_dir)
+    if args.incremental:
+        report_bad(run_incremental(files, args.parts_dir, dims, args.workers, args.chunk,
+                                   args.prune))
+        return
+
+    bad_files = {}                      # filename  ->  [innings numbers]
+    n_rows    = 0
+    writer    = None                    # opened on the first non-empty batch
+
+    # ── Stream every batch into the main table ───────────────────────────
+    try:
+        with tqdm(total=len(files), desc="Parsing matches") as bar:
+            for batch, bad, n_files in iter_batches(files, args.workers, args.chunk):
+                bad_files.update(bad)
+                bar.update(n_files)
+                if not batch.num_rows:
+                    continue
+                if writer is None:
+                    writer = pq.ParquetWriter(args.out, BALL_SCHEMA, compression="zstd")
+                writer.write_table(dims.encode(pa.Table.from_batches([batch])).cast(BALL_SCHEMA))
+                n_rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if n_rows:
+        dims.save()
+        print(f"✅  Saved {args.out}  ({n_rows:,} rows) + dimensions in {args.dims_dir}")
+    else:
+        print("❌  No rows parsed – nothing written.")
+
+    # ── Report any innings we skipped ────────────────────────────────────
+    report_bad(bad_files)
+
+
+if __name__ == "__main__":
+    main()
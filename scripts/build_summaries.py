@@ -1,58 +1,117 @@
-import duckdb,textwrap
-python con = duckdb.connect(database=":memory:")
-
-
-con.execute("""
-    CREATE OR REPLACE VIEW balls AS
-    SELECT * FROM 'balls_parted/**/*.parquet'
-""")
-
-
-con.execute("""
+"""
+build_summaries.py
+──────────────────
+Rebuilds the summary tables the API and UI read, one hive-partitioned
+directory each under --out-dir (default api/parquet):
+
+    innings_cube/                match × innings × player   (/batting, /bowling)
+    player_batting/              season × format × event × batter
+    bowler_summary/              season × format × event × bowler
+    team_phase_summary/          season × format × event × batting team
+    team_bowling_phase_summary/  season × format × event × fielding team
+    matchups/                    season × format × event × sides × batter × bowler
+                                 (/matchup, /matchup/bowler – facts.MATCHUP_SQL)
+    filter_lists.parquet         UI dropdowns: events / teams / players with
+                                 match counts + last-seen dates (facts.LISTS_SQL)
+    player_years.parquet         running totals per format × player × own team
+                                 through each season (facts.PLAYER_YEARS_SQL)
+    matchup_years.parquet        running totals per format × sides × batter ×
+                                 bowler through each season (MATCHUP_YEARS_SQL)
+
+laid out as `<name>/match_type=T20/season=2013%2F14/data.parquet` (the
+partition columns are also kept inside the files).  Each file is sorted on
+its lookup keys (event, then team / player) in small row groups, so the
+min/max statistics DuckDB writes per row group – plus the bloom filters it
+writes for dictionary-encoded columns such as the event and team names –
+let a point lookup like /team skip all but one row group.  The three single files
+span every season, so they are rebuilt from the merged outputs each run.
+
+The deliveries under balls_parted/ are scanned exactly once, into `spells`
+(match × innings × batter × bowler × phase, see api/facts.py).  Every other
+stage reads the stage before it, never the deliveries:
+
+    balls ─▶ spells ─┬─▶ cube ─────────┬─▶ player_batting
+                     │                 ├─▶ bowler_summary
+                     │                 └─▶ filter_lists, player_years
+                     ├─▶ team_innings ─┬─▶ team_phase_summary
+                     │                 └─▶ team_bowling_phase_summary
+                     └─▶ matchups ─────▶ matchup_years
+
+• `--incremental` compares the ingest manifest (balls_parted/_manifest.json)
+  with the match sha1s recorded at the last build, works out which
+  (season, match_type, event) groups gained, changed or lost matches, runs
+  the pipeline over just those groups' deliveries and merges the result into
+  the affected partitions.  Falls back to a full build when there is no
+  previous state or the deliveries are still in the string layout.
+
+Prints rows and wall time per stage.
+
+    python scripts/build_summaries.py [--incremental]
+"""
+
+from pathlib import Path
+import argparse, duckdb, json, shutil, sys, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))       # repo root
+from api import dims, facts, metrics
+from build_master_table import load_manifest, part_value, partition_dir
+
+# ── Config ───────────────────────────────────────────────────────────────
+PARTS_DIR  = Path("balls_parted")
+OUT_DIR    = Path("api/parquet")
+STATE_NAME = "_summary_state.json"         # lives in OUT_DIR
+
+ROW_GROUP_ROWS = 8_192                     # summary files: small groups → fine-grained pruning
+BLOOM_FPR      = 0.01                      # bloom filter false-positive ratio
+
+# output table → (column holding its event key – what --incremental replaces,
+#                 sort order inside each file – what row-group pruning keys on)
+OUTPUTS = {
+    "innings_cube":               ("event_id",   "event_id, player_id"),
+    "player_batting":             ("event_name", "event_name, batter"),
+    "bowler_summary":             ("event_name", "event_name, bowler"),
+    "team_phase_summary":         ("event_name", "event_name, batting_team"),
+    "team_bowling_phase_summary": ("event_name", "event_name, fielding_team"),
+    "matchups":                   ("event_id",   "batter_id, bowler_id"),
+}
+
+STATS: list[tuple[str, int, float]] = []          # (stage, rows, seconds)
+
+def stage(con, name: str, sql: str) -> None:
+    """Materialise one pipeline step as a temp table and record rows / time."""
+    t0 = time.perf_counter()
+    con.execute(f"CREATE OR REPLACE TEMP TABLE {name} AS {sql}")
+    n = con.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+    STATS.append((name, n, time.perf_counter() - t0))
+
+
+# ── Player batting ───────────────────────────────────────────────────────
+PLAYER_BATTING_SQL = f"""
 /*──────────────────────────────────────────────────────────────────────────────
    Player batting summary  •  split by match_type & event_name (tournament)
 ──────────────────────────────────────────────────────────────────────────────*/
-COPY (
-
-WITH per_ball AS (
+WITH per_innings AS (                      -- one row per match × batter
   SELECT
-    season,
-    match_type,
-    event_name,                 -- ← just use the column that already exists
-    match_id,
-    batter,
-
-    runs_batter            AS runs,
-    is_boundary_4::INT     AS four,
-    is_boundary_6::INT     AS six,
-
-    CASE WHEN extras_type = 'wides' THEN 0 ELSE 1 END AS legal_ball,
-    CASE WHEN wicket_type IS NOT NULL
-           AND player_out = batter
-         THEN 1 ELSE 0 END            AS dismissal
-  FROM balls
+    season, match_type, event_id,
+    match_id, player_id AS batter_id,
+
+    SUM(bat_runs)     AS runs,
+    SUM(fours)        AS fours,
+    SUM(sixes)        AS sixes,
+    SUM(bat_legal)    AS balls_faced,
+    SUM(outs)         AS outs
+  FROM innings_cube
+  WHERE bat_balls > 0
+  GROUP BY season, match_type, event_id, match_id, player_id
 ),
 
-per_innings AS (
-  SELECT
-    season, match_type, event_name,
-    match_id, batter,
-
-    SUM(runs)         AS runs,
-    SUM(four)         AS fours,
-    SUM(six)          AS sixes,
-    SUM(legal_ball)   AS balls_faced,
-    SUM(dismissal)    AS outs
-  FROM per_ball
-  GROUP BY season, match_type, event_name, match_id, batter
-)
-
+agg AS (
 SELECT
   /* grouping keys */
   season,
   match_type,
-  event_name,
-  batter,
+  event_id,
+  batter_id,
 
   /* totals */
   COUNT(*)                  AS innings,
@@ -62,9 +121,8 @@ SELECT
   SUM(balls_faced)          AS balls_faced,
 
   /* core ratios */
-  100.0 * SUM(runs) / NULLIF(SUM(balls_faced),0)          AS strike_rate,
-  CASE WHEN SUM(outs)=0 THEN NULL
-       ELSE CAST(SUM(runs) AS DOUBLE)/SUM(outs) END       AS average,
+  {metrics.strike_rate("SUM(runs)", "SUM(balls_faced)")}  AS strike_rate,
+  {metrics.average("SUM(runs)", "SUM(outs)")}            AS average,
 
   /* raw inning counts — fours 1-5+, sixes 1-3+ */
   SUM(CASE WHEN fours >= 1 THEN 1 ELSE 0 END) AS n_inns_≥1_fours,
@@ -78,74 +136,53 @@ SELECT
   SUM(CASE WHEN sixes >= 3 THEN 1 ELSE 0 END) AS n_inns_≥3_sixes,
 
   /* percentages */
-  100.0 * n_inns_≥1_fours / innings  AS pct_inns_≥1_fours,
-  100.0 * n_inns_≥2_fours / innings  AS pct_inns_≥2_fours,
-  100.0 * n_inns_≥3_fours / innings  AS pct_inns_≥3_fours,
-  100.0 * n_inns_≥4_fours / innings  AS pct_inns_≥4_fours,
-  100.0 * n_inns_≥5_fours / innings  AS pct_inns_≥5_fours,
+  {metrics.pct("n_inns_≥1_fours", "innings")}  AS pct_inns_≥1_fours,
+  {metrics.pct("n_inns_≥2_fours", "innings")}  AS pct_inns_≥2_fours,
+  {metrics.pct("n_inns_≥3_fours", "innings")}  AS pct_inns_≥3_fours,
+  {metrics.pct("n_inns_≥4_fours", "innings")}  AS pct_inns_≥4_fours,
+  {metrics.pct("n_inns_≥5_fours", "innings")}  AS pct_inns_≥5_fours,
 
-  100.0 * n_inns_≥1_sixes / innings  AS pct_inns_≥1_sixes,
-  100.0 * n_inns_≥2_sixes / innings  AS pct_inns_≥2_sixes,
-  100.0 * n_inns_≥3_sixes / innings  AS pct_inns_≥3_sixes
+  {metrics.pct("n_inns_≥1_sixes", "innings")}  AS pct_inns_≥1_sixes,
+  {metrics.pct("n_inns_≥2_sixes", "innings")}  AS pct_inns_≥2_sixes,
+  {metrics.pct("n_inns_≥3_sixes", "innings")}  AS pct_inns_≥3_sixes
 
 FROM per_innings
-GROUP BY season, match_type, event_name, batter
-
+GROUP BY season, match_type, event_id, batter_id
 )
-TO 'player_batting.parquet'
-(FORMAT PARQUET, COMPRESSION ZSTD)
-""")
 
+/* decode ids → names */
+SELECT season, match_type, e.name AS event_name, p.name AS batter,
+       agg.* EXCLUDE (season, match_type, event_id, batter_id)
+FROM agg
+LEFT JOIN events  e ON e.id = agg.event_id
+LEFT JOIN players p ON p.id = agg.batter_id
+"""
 
-con.execute("""
-COPY (
 
-WITH per_ball AS (
+# ── Bowlers ──────────────────────────────────────────────────────────────
+BOWLER_SQL = f"""
+WITH per_innings AS (                      -- one row per match × bowler
   SELECT
-    season,
-    match_type,
-    event_name,
-    match_id,
-    bowler,
-
-    runs_total                      AS runs_conceded,
-
-    -- legal ball flag (wides / no-balls excluded from ball count)
-    CASE WHEN extras_type IN ('wides','no-balls') THEN 0 ELSE 1 END
-      AS legal_ball,
-
-    CASE WHEN runs_total = 0 THEN 1 ELSE 0 END                     AS dot_ball,
-    CASE WHEN is_boundary_4 OR is_boundary_6 THEN 1 ELSE 0 END     AS boundary,
-
-    -- wicket credited to this bowler?
-    CASE
-      WHEN wicket_type IS NOT NULL
-       AND bowler = (SELECT bowler)
-      THEN 1 ELSE 0
-    END AS wicket
-  FROM balls
-),
+    season, match_type, event_id,
+    match_id, player_id AS bowler_id,
 
-per_innings AS (
-  SELECT
-    season, match_type, event_name,
-    match_id, bowler,
-
-    SUM(legal_ball)       AS balls_bowled,
+    SUM(bowl_legal)       AS balls_bowled,     -- wides / no-balls excluded
     SUM(runs_conceded)    AS runs_conceded,
-    SUM(wicket)           AS wickets,
-    SUM(dot_ball)         AS dot_balls,
-    SUM(boundary)         AS boundaries_conceded
-  FROM per_ball
-  GROUP BY season, match_type, event_name, match_id, bowler
-)
+    SUM(wickets)          AS wickets,          -- run outs / retirements are not
+    SUM(dots)             AS dot_balls,
+    SUM(boundaries_conc)  AS boundaries_conceded
+  FROM innings_cube
+  WHERE bowl_balls > 0
+  GROUP BY season, match_type, event_id, match_id, player_id
+),
 
+agg AS (
 SELECT
   /* grouping */
   season,
   match_type,
-  event_name,
-  bowler,
+  event_id,
+  bowler_id,
 
   COUNT(DISTINCT match_id)           AS matches,
   COUNT(*)                           AS innings_bowled,
@@ -158,14 +195,9 @@ SELECT
   SUM(boundaries_conceded)           AS boundaries_conceded,
 
   /* rate stats */
-  CASE WHEN SUM(balls_bowled)=0 THEN NULL
-       ELSE 6.0 * SUM(runs_conceded) / SUM(balls_bowled) END            AS economy,
-
-  CASE WHEN SUM(wickets)=0 THEN NULL
-       ELSE SUM(balls_bowled)::DOUBLE / SUM(wickets) END                AS strike_rate,
-
-  CASE WHEN SUM(wickets)=0 THEN NULL
-       ELSE SUM(runs_conceded)::DOUBLE / SUM(wickets) END               AS average,
+  {metrics.economy("SUM(runs_conceded)", "SUM(balls_bowled)")}      AS economy,
+  {metrics.balls_per("SUM(balls_bowled)", "SUM(wickets)")}          AS strike_rate,
+  {metrics.average("SUM(runs_conceded)", "SUM(wickets)")}           AS average,
 
   /* big-haul raw counts (NOW includes 1+) */
   SUM(CASE WHEN wickets >= 1 THEN 1 ELSE 0 END) AS n_inns_≥1_wkts,
@@ -175,337 +207,259 @@ SELECT
   SUM(CASE WHEN wickets >= 5 THEN 1 ELSE 0 END) AS n_inns_≥5_wkts,
 
   /* percentages */
-  100.0 * n_inns_≥1_wkts / innings_bowled       AS pct_inns_≥1_wkts,
-  100.0 * n_inns_≥2_wkts / innings_bowled       AS pct_inns_≥2_wkts,
-  100.0 * n_inns_≥3_wkts / innings_bowled       AS pct_inns_≥3_wkts,
-  100.0 * n_inns_≥4_wkts / innings_bowled       AS pct_inns_≥4_wkts,
-  100.0 * n_inns_≥5_wkts / innings_bowled       AS pct_inns_≥5_wkts,
-
-  100.0 * SUM(dot_balls)::DOUBLE / NULLIF(SUM(balls_bowled),0)          AS dot_pct
-
-FROM per_innings
-GROUP BY season, match_type, event_name, bowler
+  {metrics.pct("n_inns_≥1_wkts", "innings_bowled")}       AS pct_inns_≥1_wkts,
+  {metrics.pct("n_inns_≥2_wkts", "innings_bowled")}       AS pct_inns_≥2_wkts,
+  {metrics.pct("n_inns_≥3_wkts", "innings_bowled")}       AS pct_inns_≥3_wkts,
+  {metrics.pct("n_inns_≥4_wkts", "innings_bowled")}       AS pct_inns_≥4_wkts,
+  {metrics.pct("n_inns_≥5_wkts", "innings_bowled")}       AS pct_inns_≥5_wkts,
 
-)
-TO 'bowler_summary.parquet'
-(FORMAT PARQUET, COMPRESSION ZSTD)
-""")
-
-con.execute(textwrap.dedent("""
-COPY (
-
-/*──────────────────────────────────────────────────────────────
-  1. Flag every delivery
-──────────────────────────────────────────────────────────────*/
-WITH per_ball AS (
-  SELECT
-    season,
-    match_type,
-    event_name,
-    match_id,
-    innings_number,
-    batting_team,
-
-    ball_number_absolute,                 -- already 1-based in master table
-    runs_total,
-    is_boundary_4::INT  AS four,
-    is_boundary_6::INT  AS six,
-    CASE WHEN player_out IS NOT NULL
-          AND wicket_type IS NOT NULL
-         THEN 1 ELSE 0 END AS wkt
-  FROM balls
-),
-
-/*──────────────────────────────────────────────────────────────
-  2. Collapse to one row per innings × batting team
-──────────────────────────────────────────────────────────────*/
-per_innings AS (
-  SELECT
-    season, match_type, event_name,
-    match_id, innings_number,
-    batting_team,
-
-    /* whole-innings totals */
-    SUM(runs_total)  AS runs_total,
-    SUM(four)        AS fours_total,
-    SUM(six)         AS sixes_total,
-    SUM(wkt)         AS wkts_total,
-
-    /* ---- 6-over window (≤36 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN runs_total ELSE 0 END) AS runs_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN four       ELSE 0 END) AS fours_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN six        ELSE 0 END) AS sixes_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN wkt        ELSE 0 END) AS wkts_6,
-
-    /* ---- 10-over window (≤60 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN runs_total ELSE 0 END) AS runs_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN four       ELSE 0 END) AS fours_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN six        ELSE 0 END) AS sixes_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN wkt        ELSE 0 END) AS wkts_10,
-
-    /* ---- 12-over window (≤72 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN runs_total ELSE 0 END) AS runs_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN four       ELSE 0 END) AS fours_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN six        ELSE 0 END) AS sixes_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN wkt        ELSE 0 END) AS wkts_12,
-
-    /* ---- 15-over window (≤90 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN runs_total ELSE 0 END) AS runs_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN four       ELSE 0 END) AS fours_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN six        ELSE 0 END) AS sixes_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN wkt        ELSE 0 END) AS wkts_15
-  FROM per_ball
-  GROUP BY
-    season, match_type, event_name,
-    match_id, innings_number, batting_team
-)
-
-/*──────────────────────────────────────────────────────────────
-  3. Season × format × tournament × team roll-up
-──────────────────────────────────────────────────────────────*/
-SELECT
-  season,
-  match_type,
-  event_name,
-  batting_team,
-
-  COUNT(*)                      AS innings,
-
-  SUM(runs_total)   AS runs_total,
-  SUM(fours_total)  AS fours_total,
-  SUM(sixes_total)  AS sixes_total,
-  SUM(wkts_total)   AS wkts_total,
-
-  SUM(runs_6)   AS runs_6,   SUM(fours_6)  AS fours_6,   SUM(sixes_6)  AS sixes_6,   SUM(wkts_6)  AS wkts_6,
-  SUM(runs_10)  AS runs_10,  SUM(fours_10) AS fours_10,  SUM(sixes_10) AS sixes_10,  SUM(wkts_10) AS wkts_10,
-  SUM(runs_12)  AS runs_12,  SUM(fours_12) AS fours_12,  SUM(sixes_12) AS sixes_12,  SUM(wkts_12) AS wkts_12,
-  SUM(runs_15)  AS runs_15,  SUM(fours_15) AS fours_15,  SUM(sixes_15) AS sixes_15,  SUM(wkts_15) AS wkts_15,
-
-  /* handy phase averages */
-  ROUND(SUM(runs_6 )::DOUBLE / COUNT(*), 2) AS avg_runs_6,
-  ROUND(SUM(runs_10)::DOUBLE / COUNT(*), 2) AS avg_runs_10,
-  ROUND(SUM(runs_12)::DOUBLE / COUNT(*), 2) AS avg_runs_12,
-  ROUND(SUM(runs_15)::DOUBLE / COUNT(*), 2) AS avg_runs_15
+  {metrics.pct("SUM(dot_balls)", "SUM(balls_bowled)")}              AS dot_pct
 
 FROM per_innings
-GROUP BY season, match_type, event_name, batting_team
-
-)
-TO 'team_phase_summary.parquet'
-(FORMAT PARQUET, COMPRESSION ZSTD)
-"""))
-
-con.execute(textwrap.dedent("""
-COPY (
-
-/*──────────────────────────────────────────────────────────────
-  1. Flag every delivery
-──────────────────────────────────────────────────────────────*/
-WITH per_ball AS (
-  SELECT
-    season,
-    match_type,
-    event_name,
-    match_id,
-    innings_number,
-    batting_team,
-
-    ball_number_absolute,                 -- already 1-based in master table
-    runs_total,
-    is_boundary_4::INT  AS four,
-    is_boundary_6::INT  AS six,
-    CASE WHEN player_out IS NOT NULL
-          AND wicket_type IS NOT NULL
-         THEN 1 ELSE 0 END AS wkt
-  FROM balls
-),
-
-/*──────────────────────────────────────────────────────────────
-  2. Collapse to one row per innings × batting team
-──────────────────────────────────────────────────────────────*/
-per_innings AS (
-  SELECT
-    season, match_type, event_name,
-    match_id, innings_number,
-    batting_team,
-
-    /* whole-innings totals */
-    SUM(runs_total)  AS runs_total,
-    SUM(four)        AS fours_total,
-    SUM(six)         AS sixes_total,
-    SUM(wkt)         AS wkts_total,
-
-    /* ---- 6-over window (≤36 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN runs_total ELSE 0 END) AS runs_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN four       ELSE 0 END) AS fours_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN six        ELSE 0 END) AS sixes_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN wkt        ELSE 0 END) AS wkts_6,
-
-    /* ---- 10-over window (≤60 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN runs_total ELSE 0 END) AS runs_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN four       ELSE 0 END) AS fours_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN six        ELSE 0 END) AS sixes_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN wkt        ELSE 0 END) AS wkts_10,
-
-    /* ---- 12-over window (≤72 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN runs_total ELSE 0 END) AS runs_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN four       ELSE 0 END) AS fours_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN six        ELSE 0 END) AS sixes_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN wkt        ELSE 0 END) AS wkts_12,
-
-    /* ---- 15-over window (≤90 balls) ---- */
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN runs_total ELSE 0 END) AS runs_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN four       ELSE 0 END) AS fours_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN six        ELSE 0 END) AS sixes_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN wkt        ELSE 0 END) AS wkts_15
-  FROM per_ball
-  GROUP BY
-    season, match_type, event_name,
-    match_id, innings_number, batting_team
-)
-
-/*──────────────────────────────────────────────────────────────
-  3. Season × format × tournament × team roll-up
-──────────────────────────────────────────────────────────────*/
-SELECT
-  season,
-  match_type,
-  event_name,
-  batting_team,
-
-  COUNT(*)                      AS innings,
-
-  SUM(runs_total)   AS runs_total,
-  SUM(fours_total)  AS fours_total,
-  SUM(sixes_total)  AS sixes_total,
-  SUM(wkts_total)   AS wkts_total,
-
-  SUM(runs_6)   AS runs_6,   SUM(fours_6)  AS fours_6,   SUM(sixes_6)  AS sixes_6,   SUM(wkts_6)  AS wkts_6,
-  SUM(runs_10)  AS runs_10,  SUM(fours_10) AS fours_10,  SUM(sixes_10) AS sixes_10,  SUM(wkts_10) AS wkts_10,
-  SUM(runs_12)  AS runs_12,  SUM(fours_12) AS fours_12,  SUM(sixes_12) AS sixes_12,  SUM(wkts_12) AS wkts_12,
-  SUM(runs_15)  AS runs_15,  SUM(fours_15) AS fours_15,  SUM(sixes_15) AS sixes_15,  SUM(wkts_15) AS wkts_15,
-
-  /* handy phase averages */
-  ROUND(SUM(runs_6 )::DOUBLE / COUNT(*), 2) AS avg_runs_6,
-  ROUND(SUM(runs_10)::DOUBLE / COUNT(*), 2) AS avg_runs_10,
-  ROUND(SUM(runs_12)::DOUBLE / COUNT(*), 2) AS avg_runs_12,
-  ROUND(SUM(runs_15)::DOUBLE / COUNT(*), 2) AS avg_runs_15
-
-FROM per_innings
-GROUP BY season, match_type, event_name, batting_team
-
-)
-TO 'team_phase_summary.parquet'
-(FORMAT PARQUET, COMPRESSION ZSTD)
-"""))
-
-con.execute(textwrap.dedent("""
-
-COPY (
-
-/*─────────────────────────────────────────────────────────────
-  1. Mark each delivery from the bowling side’s POV
-─────────────────────────────────────────────────────────────*/
-WITH per_ball AS (
-  SELECT
-    season,
-    match_type,
-    event_name,
-    match_id,
-    innings_number,
-
-    bowling_team,                        -- ← fielding side key
-    ball_number_absolute,
-    runs_total,                          -- runs conceded on this ball
-    is_boundary_4::INT  AS four_conc,
-    is_boundary_6::INT  AS six_conc,
-
-    CASE WHEN player_out IS NOT NULL
-          AND wicket_type IS NOT NULL
-         THEN 1 ELSE 0 END AS wkt
-  FROM balls
-),
-
-/*─────────────────────────────────────────────────────────────
-  2. Aggregate once per innings × bowling team
-─────────────────────────────────────────────────────────────*/
-per_innings AS (
-  SELECT
-    season, match_type, event_name,
-    match_id, innings_number,
-    bowling_team                                   AS fielding_team,
-
-    /* whole-innings totals */
-    SUM(runs_total)  AS runs_conc_total,
-    SUM(four_conc)   AS fours_conc_total,
-    SUM(six_conc)    AS sixes_conc_total,
-    SUM(wkt)         AS wkts_total,
-
-    /* ---- phase windows ---- */
-    /* 0-6 overs */
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN runs_total  ELSE 0 END) AS runs_conc_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN four_conc   ELSE 0 END) AS fours_conc_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN six_conc    ELSE 0 END) AS sixes_conc_6,
-    SUM(CASE WHEN ball_number_absolute <= 36 THEN wkt         ELSE 0 END) AS wkts_6,
-
-    /* 0-10 overs */
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN runs_total  ELSE 0 END) AS runs_conc_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN four_conc   ELSE 0 END) AS fours_conc_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN six_conc    ELSE 0 END) AS sixes_conc_10,
-    SUM(CASE WHEN ball_number_absolute <= 60 THEN wkt         ELSE 0 END) AS wkts_10,
-
-    /* 0-12 overs */
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN runs_total  ELSE 0 END) AS runs_conc_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN four_conc   ELSE 0 END) AS fours_conc_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN six_conc    ELSE 0 END) AS sixes_conc_12,
-    SUM(CASE WHEN ball_number_absolute <= 72 THEN wkt         ELSE 0 END) AS wkts_12,
-
-    /* 0-15 overs */
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN runs_total  ELSE 0 END) AS runs_conc_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN four_conc   ELSE 0 END) AS fours_conc_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN six_conc    ELSE 0 END) AS sixes_conc_15,
-    SUM(CASE WHEN ball_number_absolute <= 90 THEN wkt         ELSE 0 END) AS wkts_15
-  FROM per_ball
-  GROUP BY
-    season, match_type, event_name,
-    match_id, innings_number, bowling_team
-)
-
-/*─────────────────────────────────────────────────────────────
-  3. Roll up to season × format × tournament × fielding team
-─────────────────────────────────────────────────────────────*/
-SELECT
-  season,
-  match_type,
-  event_name,
-  fielding_team,
-
-  COUNT(*)                     AS innings,
-
-  /* whole-innings totals */
-  SUM(runs_conc_total)   AS runs_conc_total,
-  SUM(fours_conc_total)  AS fours_conc_total,
-  SUM(sixes_conc_total)  AS sixes_conc_total,
-  SUM(wkts_total)        AS wkts_total,
-
-  /* phase totals */
-  SUM(runs_conc_6)   AS runs_conc_6,   SUM(fours_conc_6)  AS fours_conc_6,   SUM(sixes_conc_6)  AS sixes_conc_6,   SUM(wkts_6)   AS wkts_6,
-  SUM(runs_conc_10)  AS runs_conc_10,  SUM(fours_conc_10) AS fours_conc_10,  SUM(sixes_conc_10) AS sixes_conc_10,  SUM(wkts_10)  AS wkts_10,
-  SUM(runs_conc_12)  AS runs_conc_12,  SUM(fours_conc_12) AS fours_conc_12,  SUM(sixes_conc_12) AS sixes_conc_12,  SUM(wkts_12)  AS wkts_12,
-  SUM(runs_conc_15)  AS runs_conc_15,  SUM(fours_conc_15) AS fours_conc_15,  SUM(sixes_conc_15) AS sixes_conc_15,  SUM(wkts_15)  AS wkts_15,
-
-  /* convenience averages (runs conceded per innings) */
-  ROUND(SUM(runs_conc_6 )::DOUBLE / COUNT(*), 2) AS avg_runs_conc_6,
-  ROUND(SUM(runs_conc_10)::DOUBLE / COUNT(*), 2) AS avg_runs_conc_10,
-  ROUND(SUM(runs_conc_12)::DOUBLE / COUNT(*), 2) AS avg_runs_conc_12,
-  ROUND(SUM(runs_conc_15)::DOUBLE / COUNT(*), 2) AS avg_runs_conc_15
-
-FROM per_innings
-GROUP BY season, match_type, event_name, fielding_team
-
+GROUP BY season, match_type, event_id, bowler_id
 )
-TO 'team_bowling_phase_summary.parquet'
-(FORMAT PARQUET, COMPRESSION ZSTD)
-"""))
 
-print("✓ all summary parquets rebuilt")
\ No newline at end of file
+/* decode ids → names */
+SELECT season, match_type, e.name AS event_name, p.name AS bowler,
+       agg.* EXCLUDE (season, match_type, event_id, bowler_id)
+FROM agg
+LEFT JOIN events  e ON e.id = agg.event_id
+LEFT JOIN players p ON p.id = agg.bowler_id
+"""
+
+
+# ── Team phase summaries (batting side / fielding side) ─────────────────
+TEAM_COLS = (["runs_total", "fours_total", "sixes_total", "wkts_total"] +
+             [f"{m}_{o}" for o in facts.PHASES for m in ("runs", "fours", "sixes", "wkts")])
+
+def team_sql(team_id: str, team_col: str, conc: bool) -> str:
+    """
+    Season × format × tournament × team roll-up of team_innings.  conc=True
+    is the fielding side's view: runs/fours/sixes become *_conc_*.
+    """
+    ren = lambda c: (c.replace("runs", "runs_conc").replace("fours", "fours_conc")
+                      .replace("sixes", "sixes_conc") if conc else c)
+    sums = ",\n      ".join(f"SUM({c}) AS {ren(c)}" for c in TEAM_COLS)
+    avgs = ",\n      ".join(f"{metrics.ratio(f'SUM(runs_{o})', 'COUNT(*)', digits=2)} AS avg_{ren('runs')}_{o}"
+                            for o in facts.PHASES)
+    return f"""
+    WITH agg AS (
+    SELECT
+      season, match_type, event_id,
+      {team_id} AS team_id,
+
+      COUNT(*) AS innings,
+      {sums},
+
+      /* handy phase averages */
+      {avgs}
+    FROM team_innings
+    GROUP BY season, match_type, event_id, {team_id}
+    )
+
+    /* decode ids → names */
+    SELECT season, match_type, e.name AS event_name, t.name AS {team_col},
+           agg.* EXCLUDE (season, match_type, event_id, team_id)
+    FROM agg
+    LEFT JOIN events e ON e.id = agg.event_id
+    LEFT JOIN teams  t ON t.id = agg.team_id
+    """
+
+
+# ── Pipeline ─────────────────────────────────────────────────────────────
+def run_pipeline(con) -> None:
+    """`balls` view → one temp table per OUTPUTS entry."""
+    stage(con, "spells",       facts.SPELL_SQL.format(balls="balls"))     # the only full scan
+    stage(con, "innings_cube", facts.CUBE_SQL.format(spells="spells"))
+    stage(con, "team_innings", facts.TEAM_INNINGS_SQL.format(spells="spells"))
+    stage(con, "player_batting", PLAYER_BATTING_SQL)
+    stage(con, "bowler_summary", BOWLER_SQL)
+    stage(con, "team_phase_summary",
+          team_sql("batting_team_id", "batting_team",  conc=False))
+    stage(con, "team_bowling_phase_summary",
+          team_sql("bowling_team_id", "fielding_team", conc=True))
+    stage(con, "matchups",     facts.MATCHUP_SQL.format(spells="spells"))
+
+
+# ── Output partitions ────────────────────────────────────────────────────
+def lit(v: str) -> str:
+    return "NULL" if v is None else "'" + str(v).replace("'", "''") + "'"
+
+
+def part_file(out_dir: Path, name: str, mtype: str, season: str) -> Path:
+    return (out_dir / name / f"match_type={part_value(mtype)}"
+                           / f"season={part_value(season)}" / "data.parquet")
+
+
+def write_part(con, fp: Path, sql: str, order: str) -> None:
+    """Atomically replace one partition file with `sql` sorted on `order`; no rows → remove it."""
+    if not con.execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0]:
+        fp.unlink(missing_ok=True)
+        for d in (fp.parent, fp.parent.parent):
+            if d.exists() and not any(d.iterdir()):
+                d.rmdir()
+        return
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fp.with_suffix(".parquet.tmp")
+    con.execute(f"COPY (SELECT * FROM ({sql}) ORDER BY {order}) TO '{tmp}' "
+                f"(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {ROW_GROUP_ROWS}, "
+                f"BLOOM_FILTER_FALSE_POSITIVE_RATIO {BLOOM_FPR})")
+    tmp.replace(fp)
+
+
+def write_outputs(con, out_dir: Path, incremental: bool) -> int:
+    """
+    Full build → rewrite every output directory.  Incremental → for each
+    (match_type, season) holding a `touched` group, keep the other events'
+    rows from the current file and swap in the fresh rows.
+    """
+    n_files = 0
+    for name, (key, order) in OUTPUTS.items():
+        if incremental:
+            parts = con.execute("SELECT DISTINCT match_type, season FROM touched").fetchall()
+            match = (f"t.event_id IS NOT DISTINCT FROM o.event_id" if key == "event_id" else
+                     f"(SELECT name FROM events WHERE id = t.event_id) IS NOT DISTINCT FROM o.event_name")
+        else:
+            shutil.rmtree(out_dir / name, ignore_errors=True)
+            (out_dir / f"{name}.parquet").unlink(missing_ok=True)    # pre-partitioning file
+            parts = con.execute(f"SELECT DISTINCT match_type, season FROM {name}").fetchall()
+        for mtype, season in parts:
+            fp    = part_file(out_dir, name, mtype, season)
+            fresh = (f"SELECT * FROM {name} WHERE match_type IS NOT DISTINCT FROM {lit(mtype)}"
+                     f" AND season IS NOT DISTINCT FROM {lit(season)}")
+            if incremental and fp.exists():        # file's own VARCHAR season, not the dir's guess
+                fresh = f"""
+                    SELECT * FROM read_parquet('{fp}', hive_partitioning = false) o
+                    WHERE NOT EXISTS (SELECT 1 FROM touched t
+                                      WHERE t.match_type IS NOT DISTINCT FROM o.match_type
+                                        AND t.season IS NOT DISTINCT FROM o.season
+                                        AND {match})
+                    UNION ALL BY NAME
+                    {fresh}"""
+            write_part(con, fp, fresh, order)
+            n_files += 1
+    return n_files
+
+
+# ── Incremental state ────────────────────────────────────────────────────
+def load_state(out_dir: Path) -> dict[str, dict]:
+    """match_id → {sha1, group: [season, match_type, event_id]} at the last build."""
+    fp = out_dir / STATE_NAME
+    if not fp.exists():
+        return {}
+    return json.loads(fp.read_text())["matches"]
+
+
+def save_state(out_dir: Path, matches: dict[str, dict]) -> None:
+    fp  = out_dir / STATE_NAME
+    tmp = fp.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": 1, "matches": matches}, sort_keys=True))
+    tmp.replace(fp)
+
+
+def scan_sql(files: list[Path]) -> str:
+    lst = ", ".join(lit(f) for f in files)
+    return f"read_parquet([{lst}], hive_partitioning = true, union_by_name = true)"
+
+
+def find_touched(con, parts_dir: Path, manifest: dict, state: dict) -> set[tuple]:
+    """(season, match_type, event_id) groups that gained, changed or lost a match."""
+    changed = [mid for mid, m in manifest.items() if state.get(mid, {}).get("sha1") != m.get("sha1")]
+    removed = [mid for mid in state if mid not in manifest]
+    groups  = {tuple(state[mid]["group"]) for mid in changed + removed if mid in state}
+
+    parts = {(manifest[mid]["season"], manifest[mid]["match_type"])
+             for mid in changed if "season" in manifest[mid]}
+    files = [fp for key in parts for fp in sorted(partition_dir(parts_dir, *key).glob("*.parquet"))]
+    if files:                                     # where the new / changed matches landed
+        ids = ", ".join(lit(mid) for mid in changed)
+        groups |= set(con.execute(f"""
+            SELECT DISTINCT replace(season::VARCHAR, '%2F', '/'), match_type, event_id
+            FROM {scan_sql(files)} WHERE match_id IN ({ids})""").fetchall())
+    return groups
+
+
+# ── Main ─────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="balls_parted/ → summary Parquet")
+    ap.add_argument("--parts-dir", type=Path, default=PARTS_DIR)
+    ap.add_argument("--out-dir",   type=Path, default=OUT_DIR)
+    ap.add_argument("--incremental", action="store_true",
+                    help="recompute only the season/match_type/event groups with new matches")
+    args = ap.parse_args()
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
+    con = duckdb.connect(database=":memory:")
+
+    # Names are int ids (api/dims.py): group on the ids, decode only on output.
+    src = f"read_parquet('{args.parts_dir}/**/*.parquet', hive_partitioning = true, union_by_name = true)"
+    ids = dims.load(con, src)
+
+    manifest = load_manifest(args.parts_dir)
+    state    = load_state(args.out_dir)
+    incremental = (args.incremental and ids and bool(state) and bool(manifest)
+                   and all((args.out_dir / name).is_dir() for name in OUTPUTS))
+    if args.incremental and not incremental:
+        print("ℹ️  No previous build state (or string-layout deliveries) – full rebuild.")
+
+    if incremental:
+        touched = find_touched(con, args.parts_dir, manifest, state)
+        if not touched:
+            print("✅  Nothing new – summaries already up to date.")
+            return
+        con.execute("CREATE TEMP TABLE touched (season VARCHAR, match_type VARCHAR, event_id INT)")
+        con.executemany("INSERT INTO touched VALUES (?, ?, ?)", sorted(touched, key=str))
+        files = [fp for s, m in {(s, m) for s, m, _ in touched}
+                 for fp in sorted(partition_dir(args.parts_dir, s, m).glob("*.parquet"))]
+        con.execute(f"""
+            CREATE OR REPLACE VIEW balls AS
+            SELECT * FROM {scan_sql(files) if files else f"(SELECT * FROM {src} LIMIT 0)"} s
+            WHERE EXISTS (SELECT 1 FROM touched t
+                          WHERE t.season IS NOT DISTINCT FROM replace(s.season::VARCHAR, '%2F', '/')
+                            AND t.match_type IS NOT DISTINCT FROM s.match_type
+                            AND t.event_id IS NOT DISTINCT FROM s.event_id)
+        """)
+    else:
+        con.execute(f"""
+            CREATE OR REPLACE VIEW balls AS
+            SELECT * FROM {src if ids else dims.encoded(src)}
+        """)
+
+    run_pipeline(con)
+
+    t0 = time.perf_counter()
+    n_files = write_outputs(con, args.out_dir, incremental)
+    STATS.append(("write", n_files, time.perf_counter() - t0))
+
+    # whole-history tables over the merged outputs, not just this run's groups:
+    # small, always rebuilt, one <name>.parquet each in OUT_DIR
+    merged = lambda name: (f"read_parquet('{args.out_dir / name / '*' / '*' / '*.parquet'}', "
+                           "hive_partitioning = false)")
+    for name, sql in (("filter_lists",  facts.LISTS_SQL.format(cube=merged("innings_cube"))),
+                      ("player_years",  facts.PLAYER_YEARS_SQL.format(cube=merged("innings_cube"))),
+                      ("matchup_years", facts.MATCHUP_YEARS_SQL.format(matchups=merged("matchups")))):
+        stage(con, name, sql)
+        con.execute(f"COPY {name} TO '{args.out_dir / name}.parquet' "
+                    "(FORMAT PARQUET, COMPRESSION ZSTD)")
+
+    # remember which group every match fed, for the next --incremental run
+    seen = {mid: [s, m, e] for mid, s, m, e in con.execute(
+        "SELECT DISTINCT match_id, season, match_type, event_id FROM spells").fetchall()}
+    keep = state if incremental else {}
+    if incremental:
+        dropped = {tuple(g) for g in con.execute("SELECT * FROM touched").fetchall()}
+        keep = {mid: v for mid, v in keep.items() if tuple(v["group"]) not in dropped}
+    save_state(args.out_dir, {
+        **{mid: v for mid, v in keep.items() if mid in manifest},
+        **{mid: {"sha1": manifest.get(mid, {}).get("sha1"), "group": g} for mid, g in seen.items()},
+    })
+
+    for name, n, secs in STATS:
+        unit = "files" if name == "write" else "rows"
+        print(f"  {name:<28} {n:>12,} {unit:<5} {secs:>8.2f} s")
+    mode = f"{len(touched)} group(s) refreshed" if incremental else "all summary parquets rebuilt"
+    print(f"✓ {mode} in {sum(s for _, _, s in STATS):.2f} s → {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+compact_parquet.py
+──────────────────
+Rewrites every `season=…/match_type=…` partition under balls_parted/ into a
+few right-sized files, because per-file open + footer parsing dominates scans
+of hundreds of tens-of-KB fragments.
+
+• Rows sorted by match_id, innings_number, ball_number_absolute
+• ZSTD, dictionary-encoded player/team/venue strings, fixed row-group size
+• Target file size (`--target-mb`) → rows per file, estimated from the
+  partition's current bytes/row
+
+Prints file counts, bytes and a full-scan timing before and after.
+
+    python scripts/compact_parquet.py --parts-dir balls_parted
+"""
+
+from pathlib import Path
+import argparse, time
+import duckdb
+from tqdm import tqdm
+
+from build_master_table import DIMS_DIR, Dims, ROW_GROUP_ROWS, is_legacy, read_partition, write_partition
+
+# ── Config ───────────────────────────────────────────────────────────────
+PARTS_DIR   = Path("balls_parted")
+TARGET_MB   = 64
+SCAN_REPEAT = 3            # best-of-N for the scan timing
+
+
+def partitions(parts_dir: Path) -> list[Path]:
+    return sorted(d for d in parts_dir.glob("season=*/match_type=*") if d.is_dir())
+
+
+def footprint(parts_dir: Path) -> tuple[int, int]:
+    files = list(parts_dir.glob("season=*/match_type=*/*.parquet"))
+    return len(files), sum(fp.stat().st_size for fp in files)
+
+
+def scan_seconds(parts_dir: Path) -> float:
+    """Best-of-N wall time for a full aggregate scan, like the API's cold path."""
+    src = f"read_parquet('{parts_dir}/**/*.parquet', hive_partitioning = true)"
+    best = float("inf")
+    for _ in range(SCAN_REPEAT):
+        con = duckdb.connect()                       # fresh: no cached metadata
+        t0  = time.perf_counter()
+        con.execute(f"SELECT match_type, COUNT(*), SUM(runs_total), COUNT(DISTINCT match_id) "
+                    f"FROM {src} GROUP BY 1").fetchall()
+        best = min(best, time.perf_counter() - t0)
+        con.close()
+    return best
+
+
+def compact(part: Path, dims: Dims, target_bytes: int, row_group: int, force: bool) -> bool:
+    """Rewrite one partition; returns False when it was already compact."""
+    files  = sorted(part.glob("*.parquet"))
+    size   = sum(fp.stat().st_size for fp in files)
+    legacy = is_legacy(part)
+    table  = read_partition(part, dims)                # string-layout files get ids
+    if not table.num_rows:
+        return False
+
+    per_row   = max(size / table.num_rows, 1e-9)
+    file_rows = max(row_group, int(target_bytes / per_row) // row_group * row_group)
+    n_target  = -(-table.num_rows // file_rows)
+    if len(files) <= n_target and not force and not legacy:
+        return False
+    write_partition(part, table, file_rows=file_rows, row_group=row_group)
+    return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compact balls_parted/ partitions")
+    ap.add_argument("--parts-dir", type=Path, default=PARTS_DIR)
+    ap.add_argument("--dims-dir",  type=Path, default=DIMS_DIR)
+    ap.add_argument("--target-mb", type=float, default=TARGET_MB, help="target file size")
+    ap.add_argument("--row-group", type=int, default=ROW_GROUP_ROWS, help="rows per row group")
+    ap.add_argument("--force", action="store_true",
+                    help="also rewrite partitions that already have few enough files")
+    args = ap.parse_args()
+
+    n_before, b_before = footprint(args.parts_dir)
+    t_before = scan_seconds(args.parts_dir)
+
+    dims      = Dims(args.dims_dir)
+    rewritten = sum(
+        compact(part, dims, int(args.target_mb * 2**20), args.row_group, args.force)
+        for part in tqdm(partitions(args.parts_dir), desc="Compacting partitions")
+    )
+    dims.save()
+
+    n_after, b_after = footprint(args.parts_dir)
+    t_after = scan_seconds(args.parts_dir)
+
+    print(f"✅  Rewrote {rewritten} partition(s) under {args.parts_dir}")
+    print(f"    files : {n_before:>6,} → {n_after:,}")
+    print(f"    bytes : {b_before / 2**20:>9.1f} MB → {b_after / 2**20:.1f} MB")
+    print(f"    scan  : {t_before * 1000:>9.1f} ms → {t_after * 1000:.1f} ms "
+          f"(best of {SCAN_REPEAT})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+synth_data.py
+─────────────
+Synthetic ball-by-ball data in exactly the layout build_master_table.py
+writes – id-encoded `season=/match_type=` partitions (PART_SCHEMA, via
+write_partition) plus the players / teams / venues / events dimension
+tables – at any multiple of the real archive, for benchmarking.
+
+• `--scale 1` ≈ the Cricsheet archive in data/ (REAL_MATCHES matches,
+  ~9.5 M deliveries); 10 and 100 multiply matches, teams, players, venues
+  and events alike, so per-player / per-team densities stay realistic.
+
+• Deterministic for a given --seed / --scale.  Every match has a format,
+  season and event; an event draws its teams from a fixed window of its
+  format's team pool, teams field an XI out of a SQUAD-man squad, wickets
+  walk the batting order, bowlers rotate by over.
+
+• Vectorised with numpy one partition at a time, so memory peaks at the
+  largest partition (≈ 2 GB at --scale 100), not the whole dataset.
+
+• `--json DIR` instead writes `--matches` Cricsheet-format match files
+  (innings → overs → deliveries, same names and distributions) – a fixed
+  corpus for benchmarking the JSON → Parquet ingest itself.
+
+    python scripts/synth_data.py --scale 10 --parts-dir bench_data/x10/balls_parted \
+                                 --dims-dir  bench_data/x10/dims
+    python scripts/synth_data.py --json bench_data/json --matches 2000
+"""
+
+from datetime import date, timedelta
+from pathlib import Path
+import argparse, json, random, time
+import numpy as np
+import pyarrow as pa
+from tqdm import tqdm
+
+from build_master_table import PART_SCHEMA, Dims, partition_dir, write_partition
+
+# ── Shape of the real archive ────────────────────────────────────────────
+VERSION       = 1          # bump when the generated data changes shape
+REAL_MATCHES  = 15_392     # data/README.txt
+SEASONS       = range(2001, 2026)
+SQUAD         = 25         # players per team
+
+# format → share of matches, teams, events (at scale 1), innings, balls per innings
+FORMATS = {
+    "T20":  dict(share=0.62, teams=320, events=900, innings=2, balls=(90, 128)),
+    "ODI":  dict(share=0.24, teams=110, events=420, innings=2, balls=(200, 310)),
+    "Test": dict(share=0.14, teams=40,  events=160, innings=4, balls=(300, 820)),
+}
+VENUES      = 600
+CITIES      = 300
+EVENT_TEAMS = 8            # teams an event draws from
+
+RUN_VALUES = [0, 1, 2, 3, 4, 6]
+RUNS     = np.array(RUN_VALUES)
+RUNS_P   = {"T20":  [0.36, 0.37, 0.07, 0.01, 0.13, 0.06],
+            "ODI":  [0.45, 0.33, 0.07, 0.01, 0.11, 0.03],
+            "Test": [0.68, 0.19, 0.04, 0.01, 0.075, 0.005]}
+EXTRAS   = [None, "wides", "noballs", "legbyes", "byes"]
+EXTRAS_P = [0.94, 0.03, 0.008, 0.017, 0.005]
+WICKET_P = {"T20": 0.055, "ODI": 0.03, "Test": 0.018}
+KINDS    = ["caught", "bowled", "lbw", "run out", "stumped", "caught and bowled", "hit wicket"]
+KINDS_P  = [0.58, 0.17, 0.12, 0.07, 0.03, 0.02, 0.01]
+FIELDED  = np.array([k in ("caught", "run out", "stumped") for k in KINDS])
+
+EPOCH = date(1970, 1, 1)
+
+
+# ── Dimensions ───────────────────────────────────────────────────────────
+def pools(scale: float) -> dict[str, dict[str, range]]:
+    """format → {"teams": id range, "events": id range}; pools grow with scale."""
+    out, t0, e0 = {}, 0, 0
+    for fmt, f in FORMATS.items():
+        nt = max(EVENT_TEAMS, round(f["teams"] * scale))
+        ne = max(1, round(f["events"] * scale))
+        out[fmt] = {"teams": range(t0, t0 + nt), "events": range(e0, e0 + ne)}
+        t0, e0 = t0 + nt, e0 + ne
+    return out
+
+
+def dim_names(pool: dict, scale: float) -> dict[str, list[str]]:
+    n_teams  = sum(len(p["teams"]) for p in pool.values())
+    events   = [f"{fmt} Event {i:05d}" for fmt, p in pool.items() for i in p["events"]]
+    return {"players": [f"Player {i:07d}" for i in range(n_teams * SQUAD)],
+            "teams":   [f"Team {i:05d}" for i in range(n_teams)],
+            "venues":  [f"Venue {i:05d}" for i in range(max(1, round(VENUES * scale)))],
+            "events":  events}
+
+
+# ── Deliveries ───────────────────────────────────────────────────────────
+def partitions(rng: np.random.Generator, scale: float) -> list[tuple[str, str, int, int]]:
+    """(season, match_type, season year, matches) – later seasons hold more matches."""
+    keys, w = [], []
+    for fmt, f in FORMATS.items():
+        for yr in SEASONS:
+            for season in (str(yr), f"{yr}/{(yr + 1) % 100:02d}"):
+                keys.append((season, fmt, yr))
+                w.append(f["share"] * (yr - SEASONS.start + 5) / 2)
+    counts = rng.multinomial(round(REAL_MATCHES * scale), np.array(w) / sum(w))
+    return [(*k, int(n)) for k, n in zip(keys, counts) if n]
+
+
+def synth_partition(rng: np.random.Generator, fmt: str, year: int, first_id: int,
+                    n: int, pool: dict, names: dict[str, pa.Array]) -> pa.Table:
+    """`n` matches of one season × format, ids first_id … → PART_SCHEMA table."""
+    f = FORMATS[fmt]
+    teams, events = pool[fmt]["teams"], pool[fmt]["events"]
+
+    # 1️⃣  Per match: event, two of its teams, venue, date ----------------
+    event = rng.integers(events.start, events.stop, n)
+    a     = rng.integers(0, EVENT_TEAMS, n)
+    b     = (a + rng.integers(1, EVENT_TEAMS, n)) % EVENT_TEAMS
+    base  = (event - events.start) * 7
+    home  = teams.start + (base + a) % len(teams)
+    away  = teams.start + (base + b) % len(teams)
+    venue = rng.integers(0, len(names["venues"]), n)
+    day   = (date(year, 1, 1) - EPOCH).days + rng.integers(0, 365, n)
+    mid   = pa.array([str(first_id + i) for i in range(n)], pa.string())
+
+    # 2️⃣  Per innings: batting / bowling side, XI, length -----------------
+    inn_match = np.repeat(np.arange(n), f["innings"])
+    inn_no    = np.tile(np.arange(1, f["innings"] + 1), n)
+    home_bats = (inn_no % 2 == 1) == (rng.integers(0, 2, n)[inn_match] == 1)
+    bat       = np.where(home_bats, home[inn_match], away[inn_match])
+    bowl      = np.where(home_bats, away[inn_match], home[inn_match])
+    bat_xi    = bat * SQUAD + rng.integers(0, SQUAD - 10, len(bat))
+    bowl_xi   = bowl * SQUAD + rng.integers(0, SQUAD - 10, len(bowl))
+    length    = rng.integers(f["balls"][0], f["balls"][1] + 1, len(bat))
+    start     = np.cumsum(length) - length
+
+    # 3️⃣  Per delivery ---------------------------------------------------
+    inn   = np.repeat(np.arange(len(bat)), length)
+    total = len(inn)
+    ball  = np.arange(total) - start[inn] + 1
+    over  = (ball - 1) // 6
+    match = inn_match[inn]
+
+    extra  = rng.choice(len(EXTRAS), total, p=EXTRAS_P)
+    wide   = extra == EXTRAS.index("wides")
+    runs   = np.where(wide, 0, rng.choice(RUNS, total, p=RUNS_P[fmt]))
+    extras = (extra > 0).astype(np.int64)
+
+    wkt    = rng.random(total) < WICKET_P[fmt]
+    done   = np.cumsum(wkt) - wkt                      # wickets before this ball …
+    done   = done - done[start][inn]                   # … in this innings
+    wkt   &= done < 10
+    done   = np.minimum(done, 10)
+    batter = bat_xi[inn] + done
+    kind   = rng.choice(len(KINDS), total, p=KINDS_P)
+    fielder = bowl_xi[inn] + rng.integers(0, 11, total)
+
+    cols = {
+        "match_id":             mid.take(pa.array(match)),
+        "match_date":           pa.array(day[match].astype(np.int32), pa.date32()),
+        "event_id":             event[match],
+        "venue_id":             venue[match],
+        "city":                 names["cities"].take(pa.array(venue[match] % CITIES)),
+        "innings_number":       inn_no[inn],
+        "batting_team_id":      bat[inn],
+        "bowling_team_id":      bowl[inn],
+        "over":                 over,
+        "ball_in_over":         (ball - 1) % 6 + 1,
+        "ball_number_absolute": ball,
+        "batter_id":            batter,
+        "bowler_id":            bowl_xi[inn] + 6 + over % 5,
+        "non_striker_id":       bat_xi[inn] + np.minimum(done + 1, 10),
+        "runs_batter":          runs,
+        "runs_extras":          extras,
+        "runs_total":           runs + extras,
+        "extras_type":          pa.array(EXTRAS, pa.string()).take(pa.array(extra)),
+        "is_boundary_4":        runs == 4,
+        "is_boundary_6":        runs == 6,
+        "wicket_type":          pa.array(KINDS, pa.string()).take(pa.array(kind, mask=~wkt)),
+        "player_out_id":        pa.array(batter, mask=~wkt),
+        "fielders_involved":    names["players"].take(pa.array(fielder, mask=~(wkt & FIELDED[kind]))),
+    }
+    return pa.table(cols).select(PART_SCHEMA.names).cast(PART_SCHEMA)
+
+
+def generate(parts_dir: Path, dims_dir: Path, scale: float = 1.0, seed: int = 0) -> int:
+    """Write the whole synthetic dataset; returns the number of deliveries."""
+    rng  = np.random.default_rng(seed)
+    pool = pools(scale)
+    dims = Dims(dims_dir)
+    dims.names = dim_names(pool, scale)
+    dims.save()
+    names = {dim: pa.array(dims.names[dim], pa.string()) for dim in ("players", "venues")}
+    names["cities"] = pa.array([f"City {i:03d}" for i in range(CITIES)], pa.string())
+
+    rows, next_id = 0, 1_000_000
+    for season, fmt, year, n in tqdm(partitions(rng, scale), desc="Synthesising partitions"):
+        tbl = synth_partition(rng, fmt, year, next_id, n, pool, names)
+        write_partition(partition_dir(parts_dir, season, fmt), tbl)
+        rows, next_id = rows + tbl.num_rows, next_id + n
+    return rows
+
+
+# ── Cricsheet JSON ───────────────────────────────────────────────────────
+def innings_overs(r: random.Random, fmt: str, bat: list[str], bowl: list[str]) -> list[dict]:
+    """One innings' `overs` block: six legal balls an over, batters walk in on wickets."""
+    target  = r.randint(*FORMATS[fmt]["balls"])
+    striker, other, wkts, overs = 0, 1, 0, []
+    for ov in range(-(-target // 6)):
+        bowler, dels, legal = bowl[6 + ov % 5], [], 0
+        while legal < 6 and wkts < 10:
+            extra = r.choices(EXTRAS, EXTRAS_P)[0]
+            runs  = 0 if extra == "wides" else r.choices(RUN_VALUES, RUNS_P[fmt])[0]
+            d = {"batter": bat[striker], "bowler": bowler, "non_striker": bat[other],
+                 "runs": {"batter": runs, "extras": int(extra is not None),
+                          "total": runs + int(extra is not None)}}
+            if extra:
+                d["extras"] = {extra: 1}
+            if r.random() < WICKET_P[fmt]:
+                kind = r.choices(KINDS, KINDS_P)[0]
+                d["wickets"] = [{"player_out": bat[striker], "kind": kind}]
+                if FIELDED[KINDS.index(kind)]:
+                    d["wickets"][0]["fielders"] = [{"name": r.choice(bowl)}]
+                wkts += 1
+                striker = wkts + 1
+            elif runs % 2:
+                striker, other = other, striker
+            dels.append(d)
+            legal += extra not in ("wides", "noballs")
+        overs.append({"over": ov, "deliveries": dels})
+        striker, other = other, striker
+        if wkts >= 10:
+            break
+    return overs
+
+
+def cricsheet_match(r: random.Random, pool: dict, n_venues: int) -> dict:
+    """One match as a Cricsheet 1.1.0 JSON document, named like the dims of generate()."""
+    fmt    = r.choices(list(FORMATS), [f["share"] for f in FORMATS.values()])[0]
+    teams, events = pool[fmt]["teams"], pool[fmt]["events"]
+    yr, ev = r.choice(SEASONS), r.choice(events)
+    t1, t2 = (teams.start + ((ev - events.start) * 7 + k) % len(teams)
+              for k in r.sample(range(EVENT_TEAMS), 2))
+    xi     = {t: [f"Player {t * SQUAD + k:07d}" for k in sorted(r.sample(range(SQUAD), 11))]
+              for t in (t1, t2)}
+    team   = {t: f"Team {t:05d}" for t in (t1, t2)}
+    venue  = r.randrange(n_venues)
+    season = r.choice([yr, str(yr), f"{yr}/{(yr + 1) % 100:02d}"])     # a few files use ints
+    innings = [{"team": team[bat], "overs": innings_overs(r, fmt, xi[bat], xi[bowl])}
+               for i in range(FORMATS[fmt]["innings"])
+               for bat, bowl in [(t1, t2) if i % 2 == 0 else (t2, t1)]]
+    return {
+        "meta": {"data_version": "1.1.0", "created": "2025-06-01", "revision": 1},
+        "info": {
+            "balls_per_over": 6,
+            "city":       f"City {venue % CITIES:03d}",
+            "dates":      [(date(yr, 1, 1) + timedelta(days=r.randrange(365))).isoformat()],
+            "event":      {"name": f"{fmt} Event {ev:05d}"},
+            "gender":     "male",
+            "match_type": fmt,
+            "players":    {team[t]: xi[t] for t in (t1, t2)},
+            "season":     season,
+            "teams":      [team[t1], team[t2]],
+            "venue":      f"Venue {venue:05d}",
+        },
+        "innings": innings,
+    }
+
+
+def write_corpus(out_dir: Path, matches: int, seed: int = 0, scale: float = 1.0) -> int:
+    """`matches` Cricsheet files <match_id>.json in out_dir; returns the number of deliveries."""
+    r, pool = random.Random(seed), pools(scale)
+    n_venues = len(dim_names(pool, scale)["venues"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    balls = 0
+    for i in tqdm(range(matches), desc="Writing match files"):
+        m = cricsheet_match(r, pool, n_venues)
+        balls += sum(len(o["deliveries"]) for inn in m["innings"] for o in inn["overs"])
+        (out_dir / f"{1_000_000 + i}.json").write_text(json.dumps(m))
+    return balls
+
+
+# ── Main ─────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Synthetic balls_parted/ + dims at N× the archive")
+    ap.add_argument("--scale",     type=float, default=1.0, help="multiple of the real archive")
+    ap.add_argument("--seed",      type=int,   default=0)
+    ap.add_argument("--parts-dir", type=Path,  default=Path("bench_data/x1/balls_parted"))
+    ap.add_argument("--dims-dir",  type=Path,  default=Path("bench_data/x1/dims"))
+    ap.add_argument("--json",      type=Path,  help="write Cricsheet match files here instead")
+    ap.add_argument("--matches",   type=int,   default=2000, help="with --json: files to write")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.json:
+        balls = write_corpus(args.json, args.matches, args.seed, args.scale)
+        print(f"✅  {args.matches:,} match files ({balls:,} deliveries) → {args.json}  "
+              f"[{time.perf_counter() - t0:.1f} s]")
+        return
+
+    if any(args.parts_dir.glob("season=*")):
+        print(f"❌  {args.parts_dir} already holds partitions – pick an empty directory.")
+        return
+    rows = generate(args.parts_dir, args.dims_dir, args.scale, args.seed)
+    print(f"✅  {rows:,} synthetic deliveries ({args.scale:g}× archive) → {args.parts_dir} "
+          f"+ dimensions in {args.dims_dir}  [{time.perf_counter() - t0:.1f} s]")
+
+
+if __name__ == "__main__":
+    main()
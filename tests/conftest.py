@@ -0,0 +1,32 @@
+import os, subprocess, sys, tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "scripts")]      # `api.*` and the scripts' modules
+
+# api.api / api.dims read their paths at import: point them at a scratch
+# dataset before any test imports them (the `client` fixture fills it).
+DATA = Path(tempfile.mkdtemp(prefix="cricket-tests-"))
+os.environ.update(CRICKET_BALLS_DIR=str(DATA / "balls_parted"), CRICKET_DIMS_DIR=str(DATA / "dims"),
+                  CRICKET_PARQ_DIR=str(DATA / "parquet"), CRICKET_DB=":memory:",
+                  CRICKET_SLOW_LOG=str(DATA / "slow_queries.jsonl"))
+
+@pytest.fixture(scope="session")
+def dataset() -> Path:
+    """A tiny synthetic archive plus its summary Parquet (a few seconds to build)."""
+    import synth_data
+    synth_data.generate(DATA / "balls_parted", DATA / "dims", scale=0.003, seed=0)
+    subprocess.run([sys.executable, str(ROOT / "scripts" / "build_summaries.py"),
+                    "--parts-dir", str(DATA / "balls_parted"), "--out-dir", str(DATA / "parquet")],
+                   check=True, cwd=ROOT, env=os.environ, capture_output=True)
+    return DATA
+
+@pytest.fixture(scope="session")
+def client(dataset):
+    """TestClient on the warmed-up API over `dataset`."""
+    from fastapi.testclient import TestClient
+    from api import api
+    api._startup()
+    return TestClient(api.app)
@@ -0,0 +1,52 @@
+import pyarrow as pa, pyarrow.parquet as pq
+import pytest
+
+from api import api
+
+def top_batter(client, fmt="T20"):
+    rows = client.get("/batting", params={"fmt": fmt, "last": 0, "min_inns": 1, "limit": 1}).json()
+    return rows[0]["batter"]
+
+def test_matchup_returns_rows(client):
+    batter = top_batter(client)
+    r = client.get("/matchup", params={"fmt": "T20", "batter": batter, "opp": "", "last": 0})
+    assert r.status_code == 200 and r.json()
+    bowler = r.json()[0]["bowler"]
+    r = client.get("/matchup/bowler", params={"fmt": "T20", "bowler": bowler, "last": 0})
+    assert r.status_code == 200 and batter in {row["batter"] for row in r.json()}
+
+def team_params(client, fmt="T20"):
+    event = client.get("/lists/events", params={"fmt": fmt}).json()[0]["name"]
+    team = client.get("/lists/teams", params={"fmt": fmt, "event": event}).json()[0]["name"]
+    return {"fmt": fmt, "event": event, "team": team}
+
+@pytest.mark.parametrize("media", [api.ARROW, api.PARQUET])
+def test_team_binary_formats(client, media):
+    params = team_params(client)
+    want = client.get("/team", params=params).json()
+    r = client.get("/team", params=params, headers={"accept": media})
+    assert r.status_code == 200 and r.headers["content-type"] == media
+    buf = pa.py_buffer(r.content)
+    t = pa.ipc.open_stream(buf).read_all() if media == api.ARROW else pq.read_table(buf)
+    assert t.num_rows == 1
+    assert {k: t[k][0].as_py() for k in want} == want
+
+def test_nest_chunked_and_empty():
+    chunked = pa.concat_tables([pa.table({"a": [1]}), pa.table({"a": [2]})])
+    t = api.nest({"x": chunked, "y": chunked.slice(0, 0)})
+    assert t.to_pylist() == [{"x": [{"a": 1}, {"a": 2}], "y": []}]
+
+def test_watch_survives_a_failed_version_scan(monkeypatch):
+    versions = iter([FileNotFoundError("data_0.parquet"), "v2"])
+    def version():
+        v = next(versions)
+        if isinstance(v, Exception):
+            raise v
+        return v
+    monkeypatch.setattr(api, "VERSION_EVERY", 0)
+    monkeypatch.setattr(api, "dataset_version", version)
+    w = api.Warmup()
+    w.version = "v1"
+    w.reload = lambda: setattr(w, "error", "reloaded")      # stop after the first reload
+    w.watch()
+    assert w.error == "reloaded"
@@ -0,0 +1,54 @@
+import json, os, subprocess, sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+import synth_data
+from build_master_table import NULL_PART
+from conftest import ROOT
+
+def run(script: str, *args, dims_dir: Path) -> str:
+    env = {**os.environ, "CRICKET_DIMS_DIR": str(dims_dir)}
+    r = subprocess.run([sys.executable, str(ROOT / "scripts" / f"{script}.py"), *map(str, args)],
+                       cwd=ROOT, env=env, capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    return r.stdout
+
+def totals(out_dir: Path) -> set:
+    return set(duckdb.sql(f"""
+        SELECT season, event_id, player_id, SUM(bat_runs), SUM(runs_conceded)
+        FROM read_parquet('{out_dir}/innings_cube/*/*/*.parquet', hive_partitioning = false)
+        GROUP BY ALL""").fetchall())
+
+# int-like and slash hive dirs side by side; a match without a season
+@pytest.mark.parametrize("seasons", [("2005", "2002/03"), ("2005", None)])
+def test_incremental_merge_matches_full_rebuild(tmp_path, seasons):
+    js, parts, dims = tmp_path / "json", tmp_path / "balls_parted", tmp_path / "dims"
+    synth_data.write_corpus(js, 6, seed=1, scale=0.003)
+    files = sorted(js.glob("*.json"))
+    for i, fp in enumerate(files):
+        m = json.loads(fp.read_text())
+        m["info"].update(season=seasons[i % 2], match_type="T20")
+        if m["info"]["season"] is None:
+            del m["info"]["season"]
+        fp.write_text(json.dumps(m))
+    ingest = ("--data-dir", js, "--parts-dir", parts, "--dims-dir", dims, "--workers", 1,
+              "--incremental")
+    run("build_master_table", *ingest, dims_dir=dims)
+    run("build_summaries", "--parts-dir", parts, "--out-dir", tmp_path / "inc", dims_dir=dims)
+
+    for fp in files[:2]:                        # one changed match in each season
+        m = json.loads(fp.read_text())
+        m["innings"][0]["overs"][0]["deliveries"][0]["runs"].update(batter=6, total=6)
+        fp.write_text(json.dumps(m))
+    run("build_master_table", *ingest, dims_dir=dims)
+    out = run("build_summaries", "--parts-dir", parts, "--out-dir", tmp_path / "inc",
+              "--incremental", dims_dir=dims)
+    assert "2 group(s) refreshed" in out
+
+    run("build_summaries", "--parts-dir", parts, "--out-dir", tmp_path / "full", dims_dir=dims)
+    assert totals(tmp_path / "inc") == totals(tmp_path / "full")
+    assert {r[0] for r in totals(tmp_path / "full")} == set(seasons)
+    dirs = {d.name for d in (tmp_path / "inc" / "innings_cube" / "match_type=T20").iterdir()}
+    assert len(dirs) == 2 and (None not in seasons or f"season={NULL_PART}" in dirs)
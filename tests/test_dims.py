@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import duckdb
+
+from api import dims
+
+ROWS = [  # string layout: names on every delivery, venues / events repeat
+    ("A Batter", "X Bowler", "B Batter", None,       "Team 1", "Team 2", "Ground 1", "Cup"),
+    ("A Batter", "X Bowler", "B Batter", "A Batter", "Team 1", "Team 2", "Ground 1", "Cup"),
+    ("X Bowler", "A Batter", "Y Bowler", None,       "Team 2", "Team 1", "Ground 1", "Cup"),
+    ("B Batter", "Y Bowler", "A Batter", None,       "Team 1", "Team 2", "Ground 2", None),
+]
+
+def test_string_layout_dims_are_distinct_names(tmp_path):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE src (" + ", ".join(f"{c} VARCHAR" for c in dims.ID_COLS) + ")")
+    con.executemany(f"INSERT INTO src VALUES ({', '.join('?' * len(dims.ID_COLS))})", ROWS)
+
+    assert dims.load(con, "src", dims_dir=str(tmp_path)) is False
+    for dim in dims.DIMENSIONS:
+        cols = [c for c, (_, d) in dims.ID_COLS.items() if d == dim]
+        names = {r[i] for r in ROWS for i, c in enumerate(dims.ID_COLS) if c in cols} - {None}
+        got = con.execute(f"SELECT COUNT(*), COUNT(DISTINCT name), COUNT(DISTINCT id) FROM {dim}").fetchone()
+        assert got == (len(names), len(names), len(names)), dim
+
+    # encoded() joins one dimension row per name: no row multiplication
+    assert con.execute(f"SELECT COUNT(*) FROM {dims.encoded('src')}").fetchone()[0] == len(ROWS)
+
+def test_scripts_share_the_dims_dir_default():
+    import build_master_table, compact_parquet
+    assert build_master_table.DIMS_DIR == compact_parquet.DIMS_DIR == Path(dims.DIMS_DIR)
@@ -1,16 +1,16 @@
-import time, requests, functools, streamlit as st, pandas as pd
+import time, requests, functools, streamlit as st, pandas as pd, pyarrow as pa
 
 API = "https://cricpick.onrender.com"   # ← your backend URL
 
 @functools.lru_cache(maxsize=512)
 def jget(endpoint: str, _tries: int = 3, **params):
-    """GET with up-to-3 retries; show 'Backend waking up…' instead of 502."""
+    """GET with up-to-3 retries; waits out 502 / 503 (backend waking up / warming up)."""
     url = f"{API}{endpoint}"
     for i in range(_tries):
         try:
             r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 502:
-                time.sleep(2)
+            if r.status_code in (502, 503):     # cold start / still warming up
+                time.sleep(float(r.headers.get("Retry-After", 2)))
                 continue
             if r.status_code == 404:
                 return []
@@ -22,17 +22,78 @@ def jget(endpoint: str, _tries: int = 3, **params):
                 return []
             time.sleep(2)
 
-def formats(): return jget("/lists/formats")
-def events(fmt): return [d["name"] for d in jget("/lists/events", fmt=fmt)]
-def teams(fmt, ev=""): return [d["name"] for d in jget("/lists/teams", fmt=fmt, event=ev)]
-def players(team): return [d["name"] for d in jget("/lists/players", team=team)]
+ARROW = "application/vnd.apache.arrow.stream"
+
+@functools.lru_cache(maxsize=128)
+def aget(endpoint: str, _tries: int = 3, **params) -> pd.DataFrame:
+    """Like jget, but asks for an Arrow IPC body and returns a DataFrame."""
+    url = f"{API}{endpoint}"
+    for i in range(_tries):
+        try:
+            r = requests.get(url, params=params, headers={"Accept": ARROW}, timeout=15)
+            if r.status_code in (502, 503):     # cold start / still warming up
+                time.sleep(float(r.headers.get("Retry-After", 2)))
+                continue
+            if r.status_code == 404:
+                return pd.DataFrame()
+            r.raise_for_status()
+            return pa.ipc.open_stream(r.content).read_pandas()
+        except requests.exceptions.RequestException as e:
+            if i == _tries - 1:
+                st.error(f"API error {e}")
+                return pd.DataFrame()
+            time.sleep(2)
+    return pd.DataFrame()
+
+@functools.lru_cache(maxsize=512)
+def bget(*queries, _tries: int = 3):
+    """
+    POST /batch: queries are (endpoint, ((param, value), …)) tuples; returns
+    each one's JSON ([] when it failed) – one round trip for all of them.
+    """
+    body = {"queries": [{"path": p, "params": dict(kv)} for p, kv in queries]}
+    for i in range(_tries):
+        try:
+            r = requests.post(f"{API}/batch", json=body, timeout=15)
+            if r.status_code in (502, 503):     # cold start / still warming up
+                time.sleep(float(r.headers.get("Retry-After", 2)))
+                continue
+            r.raise_for_status()
+            return [res.get("data", []) for res in r.json()["results"]]
+        except requests.exceptions.RequestException as e:
+            if i == _tries - 1:
+                st.error(f"API error {e}")
+            else:
+                time.sleep(2)
+    return [[] for _ in queries]
+
+def names(data): return [d["name"] for d in data]
+
+def sidebar_lists(fmt, ev, team):
+    """formats / events / teams / squad for this rerun's selections, batched."""
+    qs = [("/lists/formats", ()),
+          ("/lists/events", (("fmt", fmt),)),
+          ("/lists/teams", (("event", ev), ("fmt", fmt)))]
+    if team:
+        qs.append(("/lists/players", (("team", team),)))
+    fmts, evs, tms, *squad = bget(*qs)
+    return fmts, names(evs), names(tms), names(squad[0]) if squad else []
 
 # ---------- sidebar ---------------------------------------------------------
+# Widget values from this rerun are already in session_state, so every list
+# the sidebar needs is fetched up-front in one /batch call.
+ss = st.session_state
+_fmts, _evs, _tms, _squad = sidebar_lists(
+    ss.get("fmt", "T20"),
+    "" if ss.get("ev", "<Any>") == "<Any>" else ss["ev"],
+    "" if ss.get("team", "<Any>") == "<Any>" else ss["team"],
+)
+
 with st.sidebar:
-    fmt = st.selectbox("Format", formats())
-    ev  = st.selectbox("Tournament", ["<Any>"] + events(fmt))
-    tms = teams(fmt, ev if ev != "<Any>" else "")
-    team = st.selectbox("Team", ["<Any>"] + tms)
+    fmt = st.selectbox("Format", _fmts, key="fmt")
+    ev  = st.selectbox("Tournament", ["<Any>"] + _evs, key="ev")
+    tms = _tms
+    team = st.selectbox("Team", ["<Any>"] + tms, key="team")
     opp  = st.selectbox("Opponent", ["<Any>"] + tms)
     ven  = st.text_input("Venue contains…")
     inns = st.selectbox("Innings", ["Any", 1, 2])
@@ -45,7 +106,7 @@ with st.sidebar:
         # A team is selected → list only that squad
         bats = st.multiselect(
             "Select from team list",
-            players(team),
+            _squad,
             placeholder="Choose one or more batters"
         )
     else:
@@ -80,9 +141,10 @@ params = {
     "last": yrs,
     "min_inns": mmin,
     "players": ", ".join(bats),
+    "limit": top_x,              # top-K by runs, cut server-side
 }
 
-df = pd.DataFrame(jget("/batting", **params))
+df = aget("/batting", **params)
 if df.empty:
     st.warning("No rows matched.")
     st.stop()
@@ -98,11 +160,10 @@ if sel:
         "batter": sel,
         "last": yrs
     }
-    drill_data = jget("/batting/drill", **drill_params)
-    if not drill_data:
+    drill_df = aget("/batting/drill", **drill_params)
+    if drill_df.empty:
         st.info("No match-level rows for that player.")
     else:
-        drill_df = pd.DataFrame(drill_data)
         st.subheader(f"{sel} – per match breakdown")
         st.dataframe(drill_df, hide_index=True, use_container_width=True)
 
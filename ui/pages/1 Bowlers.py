@@ -1,4 +1,4 @@
-import streamlit as st, pandas as pd, requests, functools
+import streamlit as st, pandas as pd, requests, functools, time
 API="https://cricpick.onrender.com" 
 # ── robust GET with retries ────────────────────────────────────────────────
 @functools.lru_cache(maxsize=512)
@@ -7,8 +7,8 @@ def jget(endpoint: str, _tries: int = 3, **params):
     for i in range(_tries):
         try:
             r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 502:        # backend cold-start
-                time.sleep(2); continue
+            if r.status_code in (502, 503): # cold start / still warming up
+                time.sleep(float(r.headers.get("Retry-After", 2))); continue
             if r.status_code == 404:
                 return []
             r.raise_for_status()
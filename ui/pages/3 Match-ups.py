@@ -13,8 +13,8 @@ def jget(endpoint: str, _tries: int = 3, **params):
     for i in range(_tries):
         try:
             r = requests.get(url, params=params, timeout=15)
-            if r.status_code == 502:
-                time.sleep(2)
+            if r.status_code in (502, 503):     # cold start / still warming up
+                time.sleep(float(r.headers.get("Retry-After", 2)))
                 continue
             if r.status_code == 404:
                 return []
@@ -70,6 +70,7 @@ params = {
     "fmt": fmt,
     "batter": "" if batter in ("<None>", None) else batter,
     "opp": "" if opp in ("<Any>", None) else opp,
+    "event": "" if ev in ("<Any>", None) else ev,
     "last": last,
 }
 